@@ -5,12 +5,15 @@ Uses Groq API for fast, ChatGPT-level AI responses
 
 import json
 import logging
-import os
 from datetime import datetime
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, List, Optional, Tuple
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from services.conversation_summary import RollingSummary
+from services.llm_client import llm_client
+from services.session_store import ConversationSession, session_store
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +25,14 @@ class ConversationalAI:
     """AI-powered conversational model using Groq API (free, fast alternative to OpenAI)"""
 
     _instance = None
-    _client = None
     _model_name = (
         "llama-3.3-70b-versatile"  # Latest Llama model, excellent for conversations
     )
+    _completion_params = {
+        "temperature": 0.7,
+        "max_tokens": 800,  # More tokens for detailed, context-aware responses
+        "top_p": 0.9,
+    }
 
     @classmethod
     def get_instance(cls):
@@ -34,25 +41,13 @@ class ConversationalAI:
         return cls._instance
 
     def __init__(self):
-        """Initialize Groq client"""
-        try:
-            from groq import Groq
-
-            # Get API key from environment or config
-            api_key = os.getenv("GROQ_API_KEY", "")
+        """Attach to the shared async Groq client pool"""
+        self.llm = llm_client
 
-            if api_key and api_key != "your-groq-api-key-here":
-                ConversationalAI._client = Groq(api_key=api_key)
-                logger.info("✅ Groq AI initialized for ChatGPT-level conversations")
-            else:
-                logger.warning("⚠️ No Groq API key found, using fallback system")
-                logger.info("💡 Get free API key at: https://console.groq.com/")
-        except ImportError:
-            logger.warning(
-                "⚠️ Groq library not installed. Install with: pip install groq"
-            )
-        except Exception as e:
-            logger.error(f"❌ Error initializing Groq: {e}")
+        if self.llm.available:
+            logger.info("✅ Groq AI initialized for ChatGPT-level conversations")
+        else:
+            logger.warning("⚠️ No Groq API key found, using fallback system")
 
     def _load_transformers(self):
         """Lazy load transformers library"""
@@ -113,110 +108,147 @@ class ConversationalAI:
             logger.info("⚠️ Will use intelligent fallback response system")
             # Model stays None, fallback will be used
 
-    def generate_response(
-        self, user_message: str, conversation_history: List[dict], context: dict = None
+    async def generate_response(
+        self,
+        user_message: str,
+        conversation_history: List[dict],
+        context: dict = None,
+        summary: Optional[str] = None,
     ) -> str:
         """Generate AI response using Groq API for ChatGPT-level conversation"""
 
-        if ConversationalAI._client is None:
+        if not self.llm.available:
             # Fallback if no API available
             return self._fallback_response(user_message, conversation_history, context)
 
         try:
-            # Build system prompt for medical context
-            system_prompt = self._build_medical_system_prompt(context)
-
-            # Format conversation history for API
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add conversation summary if history is long (better long-term context)
-            if len(conversation_history) > 20:
-                summary = self._summarize_early_conversation(conversation_history[:-20])
-                if summary:
-                    messages.append(
-                        {
-                            "role": "system",
-                            "content": f"Earlier conversation summary: {summary}",
-                        }
-                    )
-
-            # Add conversation history (last 20 messages for better context)
-            recent_history = (
-                conversation_history[-20:]
-                if len(conversation_history) > 20
-                else conversation_history
+            messages = self._build_messages(
+                user_message, conversation_history, context, summary
             )
-            for msg in recent_history:
-                # Handle both dict and object formats
-                if isinstance(msg, dict):
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                else:
-                    # Handle Message object or similar
-                    role = getattr(msg, "role", "user")
-                    content = getattr(msg, "content", "")
-
-                messages.append({"role": role, "content": content})
-
-            # Add current message
-            messages.append({"role": "user", "content": user_message})
 
             # Call Groq API with better parameters for context
-            response = ConversationalAI._client.chat.completions.create(
+            ai_response = await self.llm.chat_completion(
+                "chat",
+                messages,
                 model=ConversationalAI._model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=800,  # More tokens for detailed, context-aware responses
-                top_p=0.9,
+                **ConversationalAI._completion_params,
             )
 
-            # Extract response
-            ai_response = response.choices[0].message.content.strip()
-
             return ai_response
 
         except Exception as e:
             logger.error(f"❌ Error calling Groq API: {e}")
             return self._fallback_response(user_message, conversation_history, context)
 
-    def _summarize_early_conversation(self, early_messages: List[dict]) -> str:
-        """Summarize earlier parts of long conversations for context retention"""
+    async def stream_response(
+        self,
+        user_message: str,
+        conversation_history: List[dict],
+        context: dict = None,
+        summary: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream the AI response token by token (falls back to a single chunk)"""
+
+        if not self.llm.available:
+            yield self._fallback_response(user_message, conversation_history, context)
+            return
+
+        streamed_any = False
         try:
-            # Extract key information from early conversation
-            text = " ".join(
-                [
-                    (
-                        msg.get("content", "")
-                        if isinstance(msg, dict)
-                        else getattr(msg, "content", "")
-                    )
-                    for msg in early_messages[-10:]  # Last 10 of the early messages
-                ]
+            messages = self._build_messages(
+                user_message, conversation_history, context, summary
             )
 
-            # Quick extraction of key medical details
-            summary_parts = []
-            if "pain" in text.lower() or "hurt" in text.lower():
-                summary_parts.append("discussed pain/discomfort")
-            if "medication" in text.lower() or "medicine" in text.lower():
-                summary_parts.append("mentioned medications")
-            if "doctor" in text.lower() or "hospital" in text.lower():
-                summary_parts.append("talked about medical visits")
-            if "test" in text.lower() or "report" in text.lower():
-                summary_parts.append("discussed test results")
-
-            return "; ".join(summary_parts) if summary_parts else ""
+            async for delta in self.llm.stream_chat_completion(
+                "chat",
+                messages,
+                model=ConversationalAI._model_name,
+                **ConversationalAI._completion_params,
+            ):
+                streamed_any = True
+                yield delta
+
+        except Exception as e:
+            logger.error(f"❌ Error streaming from Groq API: {e}")
+            if not streamed_any:
+                yield self._fallback_response(
+                    user_message, conversation_history, context
+                )
+
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: List[dict],
+        context: dict = None,
+        summary: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Build the Groq message list from system prompt, history and new message
+
+        A precomputed summary (from the session store) skips re-summarizing
+        the early part of the conversation.
+        """
+        # Build system prompt for medical context
+        system_prompt = self._build_medical_system_prompt(context)
+
+        # Format conversation history for API
+        messages = [{"role": "system", "content": system_prompt}]
+
+        # Add conversation summary if history is long (better long-term context)
+        if len(conversation_history) > 20:
+            if summary is None:
+                summary = self._summarize_early_conversation(
+                    conversation_history[:-20]
+                )
+            if summary:
+                messages.append(
+                    {
+                        "role": "system",
+                        "content": f"Earlier conversation summary: {summary}",
+                    }
+                )
+
+        # Add conversation history (last 20 messages for better context)
+        recent_history = (
+            conversation_history[-20:]
+            if len(conversation_history) > 20
+            else conversation_history
+        )
+        for msg in recent_history:
+            # Handle both dict and object formats
+            if isinstance(msg, dict):
+                role = msg.get("role", "user")
+                content = msg.get("content", "")
+            else:
+                # Handle Message object or similar
+                role = getattr(msg, "role", "user")
+                content = getattr(msg, "content", "")
+
+            messages.append({"role": role, "content": content})
+
+        # Add current message
+        messages.append({"role": "user", "content": user_message})
+
+        return messages
+
+    def _summarize_early_conversation(self, early_messages: List[dict]) -> str:
+        """Summarize earlier parts of long conversations for context retention"""
+        try:
+            # Single pass over the early messages (sessions keep this incrementally)
+            summary = RollingSummary()
+            summary.fold(early_messages)
+            return summary.text()
         except:
             return ""
 
-    def extract_symptoms_from_conversation(
+    async def extract_symptoms_from_conversation(
         self, conversation_history: List[dict]
     ) -> dict:
         """
         Extract structured symptom data from conversation history using AI
         This data will be passed to the medical analysis model
         """
-        if ConversationalAI._client is None:
+        if not self.llm.available:
             return self._manual_symptom_extraction(conversation_history)
 
         try:
@@ -246,15 +278,14 @@ Return ONLY a JSON object with this structure:
 
 IMPORTANT: symptoms array MUST have at least 1 item. Return ONLY valid JSON."""
 
-            response = ConversationalAI._client.chat.completions.create(
+            extracted_text = await self.llm.chat_completion(
+                "chat",
+                [{"role": "user", "content": extraction_prompt}],
                 model=ConversationalAI._model_name,
-                messages=[{"role": "user", "content": extraction_prompt}],
                 temperature=0.3,
                 max_tokens=1000,
             )
 
-            extracted_text = response.choices[0].message.content.strip()
-
             # Try to parse JSON
             import re
 
@@ -1288,301 +1319,378 @@ class FrontendChatResponse(BaseModel):
     analysis: Optional[AnalysisResult] = None  # Structured analysis data
 
 
-@router.post("", response_model=FrontendChatResponse)
-async def chat_endpoint_for_frontend(request: FrontendChatRequest):
+def _build_chat_context(request: FrontendChatRequest) -> dict:
+    """Build the prompt context for a frontend chat request"""
+    return {
+        "mode": request.mode,
+        "student_mode": request.student_mode,
+        "user_profile": request.user_profile,
+        "report_context": request.context,
+    }
+
+
+def _resolve_conversation(
+    request: FrontendChatRequest,
+) -> Tuple[Optional[ConversationSession], List[dict], Optional[str]]:
     """
-    Main chat endpoint for React frontend - FULL BACKEND CAPABILITIES
-    Endpoint: POST /api/v1/chat
+    Resolve the conversation history for a request
 
-    Features:
-    - Context-aware conversations (20-message history)
-    - Symptom extraction and analysis triggering
-    - Intent classification and smart routing
-    - Emergency detection with appropriate responses
-    - Intelligent risk assessment
-    - Report analysis integration
-    - Student mode for educational content
+    History sent by the client wins; otherwise the server-side session for
+    session_id is used, along with its stored summary.
+
+    Returns:
+        (session, conversation_history, summary) tuple
     """
-    try:
-        logger.info(f"💬 Chat request: {request.question[:100]}")
+    if not request.session_id:
+        return None, request.conversation_history or [], None
 
-        # Check for emergency indicators FIRST
-        is_emergency = ConversationManager.check_emergency_indicators(request.question)
+    session = session_store.get_or_create(request.session_id)
+    if request.conversation_history:
+        return session, request.conversation_history, None
 
-        if is_emergency:
-            logger.warning(f"🚨 EMERGENCY detected: {request.question[:50]}")
-            return FrontendChatResponse(
-                summary="EMERGENCY - Immediate Action Required",
-                answer=ConversationManager.generate_emergency_response(),
-                risk_level="Red",
-                confidence="High",
-                emotion="urgent",
-                next_steps=[
-                    "🚨 CALL 911 OR LOCAL EMERGENCY NUMBER IMMEDIATELY",
-                    "Do not wait or delay seeking emergency medical care",
-                    "Stay on the line with emergency services",
-                    "Follow dispatcher instructions carefully",
-                ],
-                citations=["Emergency Medical Protocols"],
-                human_line="⚠️ This appears to be a medical emergency. Call 911 immediately.",
-                raw_text=ConversationManager.generate_emergency_response(),
-            )
+    return session, session.history, session.summary
 
-        # Get conversational AI instance
-        ai = ConversationalAI.get_instance()
 
-        # Build full context for the conversation
-        context = {
-            "mode": request.mode,
-            "student_mode": request.student_mode,
-            "user_profile": request.user_profile,
-            "report_context": request.context,
-        }
+def _record_turn(
+    session: Optional[ConversationSession],
+    conversation_history: List[dict],
+    user_message: str,
+    ai_response: str,
+):
+    """Store the new exchange in the server-side session"""
+    if session is None:
+        return
 
-        # Generate intelligent AI response with FULL conversation history
-        conversation_history = request.conversation_history or []
-        logger.info(
-            f"📚 Using conversation history: {len(conversation_history)} messages"
-        )
+    try:
+        # History sent by the client replaces the stored one
+        if conversation_history is not session.history:
+            session.reset_history(conversation_history)
 
-        try:
-            ai_response = ai.generate_response(
-                user_message=request.question,
-                conversation_history=conversation_history,
-                context=context,
-            )
-            using_fallback = False
-        except Exception as ai_error:
-            # Check if it's a rate limit error
-            if "rate_limit" in str(ai_error).lower() or "429" in str(ai_error):
-                logger.warning(f"⚠️ Groq API rate limit - using intelligent fallback")
-                using_fallback = True
-            else:
-                logger.error(f"❌ AI error: {ai_error}")
-                using_fallback = True
+        # Only messages leaving the 20-message window are folded into the summary
+        session.add_turn(user_message, ai_response)
+        session_store.save(session)
+    except Exception as e:
+        logger.error(f"❌ Error saving chat session: {e}")
+
+
+def _build_emergency_frontend_response() -> FrontendChatResponse:
+    """Build the immediate-action response used for emergency messages"""
+    return FrontendChatResponse(
+        summary="EMERGENCY - Immediate Action Required",
+        answer=ConversationManager.generate_emergency_response(),
+        risk_level="Red",
+        confidence="High",
+        emotion="urgent",
+        next_steps=[
+            "🚨 CALL 911 OR LOCAL EMERGENCY NUMBER IMMEDIATELY",
+            "Do not wait or delay seeking emergency medical care",
+            "Stay on the line with emergency services",
+            "Follow dispatcher instructions carefully",
+        ],
+        citations=["Emergency Medical Protocols"],
+        human_line="⚠️ This appears to be a medical emergency. Call 911 immediately.",
+        raw_text=ConversationManager.generate_emergency_response(),
+    )
 
-            # Generate response using fallback
-            ai_response = ai._fallback_response(
-                request.question, conversation_history, context
-            )
 
-        # Classify intent for intelligent routing
-        intent, confidence = IntentClassifier.classify_intent(
-            request.question, conversation_history
-        )
-        logger.info(f"🎯 Intent: {intent} (confidence: {confidence:.2f})")
+async def _finalize_frontend_response(
+    request: FrontendChatRequest,
+    ai_response: str,
+    conversation_history: List[dict],
+    session: Optional[ConversationSession] = None,
+) -> FrontendChatResponse:
+    """
+    Add intent, risk level, next steps and (when requested) the structured
+    medical analysis to a generated chat answer
+    """
+    ai = ConversationalAI.get_instance()
+    analysis_data = None
 
-        # Check if user wants analysis OR AI suggests it
-        ready_for_analysis = False
-        ai_lower = ai_response.lower()
-        user_lower = request.question.lower()
+    # Classify intent for intelligent routing
+    intent, confidence = IntentClassifier.classify_intent(
+        request.question, conversation_history
+    )
+    logger.info(f"🎯 Intent: {intent} (confidence: {confidence:.2f})")
+
+    # Check if user wants analysis OR AI suggests it
+    ready_for_analysis = False
+    ai_lower = ai_response.lower()
+    user_lower = request.question.lower()
+
+    # User completion phrases
+    completion_phrases = [
+        "that's all",
+        "thats all",
+        "that's it",
+        "thats it",
+        "done",
+        "finish",
+        "finished",
+        "analyze",
+        "analyze now",
+        "give me results",
+        "give me the report",
+        "show me results",
+        "what's the diagnosis",
+        "get the report",
+        "run analysis",
+    ]
 
-        # User completion phrases
-        completion_phrases = [
-            "that's all",
-            "thats all",
-            "that's it",
-            "thats it",
-            "done",
-            "finish",
-            "finished",
-            "analyze",
-            "analyze now",
-            "give me results",
-            "give me the report",
-            "show me results",
-            "what's the diagnosis",
-            "get the report",
-            "run analysis",
-        ]
+    # AI trigger phrase - ONLY check user input, not AI response
+    # This prevents automatic triggering
+    if any(phrase in user_lower for phrase in completion_phrases):
+        ready_for_analysis = True
+        logger.info("✅ User requested analysis")
 
-        # AI trigger phrase - ONLY check user input, not AI response
-        # This prevents automatic triggering
-        if any(phrase in user_lower for phrase in completion_phrases):
-            ready_for_analysis = True
-            logger.info("✅ User requested analysis")
+    # If ready for analysis, extract symptoms and run medical analysis
+    if ready_for_analysis and len(conversation_history) > 2:
+        logger.info("🔬 Extracting symptoms for medical analysis...")
 
-        # If ready for analysis, extract symptoms and run medical analysis
-        if ready_for_analysis and len(conversation_history) > 2:
-            logger.info("🔬 Extracting symptoms for medical analysis...")
+        try:
+            # Import symptom analysis pipeline
+            from api.symptom_checker import run_symptom_analysis
 
-            try:
-                # Import symptom analysis functions
-                from api.symptom_checker import (
-                    _assess_severity,
-                    _assess_urgency,
-                    _check_red_flags,
-                    _generate_recommendations,
-                    _predict_conditions,
-                )
+            # Extract symptoms from conversation using AI
+            symptom_data = await ai.extract_symptoms_from_conversation(
+                conversation_history
+            )
+            symptoms_list = symptom_data.get("symptoms", [])
+            if session is not None and symptoms_list:
+                session.symptoms = symptoms_list
 
-                # Extract symptoms from conversation using AI
-                symptom_data = ai.extract_symptoms_from_conversation(
-                    conversation_history
+            if symptoms_list and len(symptoms_list) > 0:
+                logger.info(
+                    f"📊 Extracted {len(symptoms_list)} symptoms: {symptoms_list}"
                 )
-                symptoms_list = symptom_data.get("symptoms", [])
 
-                if symptoms_list and len(symptoms_list) > 0:
-                    logger.info(
-                        f"📊 Extracted {len(symptoms_list)} symptoms: {symptoms_list}"
-                    )
-
-                    # Run full medical analysis
-                    predictions = _predict_conditions(symptoms_list)
-                    severity = _assess_severity(symptoms_list, predictions)
-                    urgency = _assess_urgency(symptoms_list, predictions)
-                    recommendations = _generate_recommendations(severity, urgency)
-                    red_flags = _check_red_flags(symptoms_list)
-
-                    # Create structured analysis data for frontend rendering
-                    analysis_data = AnalysisResult(
-                        conditions=[
-                            {
-                                "name": pred.get("condition", "Unknown"),
-                                "confidence": f"{pred.get('confidence', 0)*100:.1f}%",
-                                "reasoning": pred.get("reasoning", ""),
-                                "emergency": pred.get("emergency", False),
-                            }
-                            for pred in predictions[:3]
-                        ],
-                        severity=severity,
-                        urgency=urgency,
-                        red_flags=red_flags if red_flags else [],
-                        recommendations=recommendations if recommendations else [],
-                    )
+                # Run full medical analysis (AI stages run concurrently)
+                analysis = await run_symptom_analysis(symptoms_list)
+                predictions = analysis["predictions"]
+                severity = analysis["severity"]
+                urgency = analysis["urgency"]
+                recommendations = analysis["recommendations"]
+                red_flags = analysis["red_flags"]
+
+                # Create structured analysis data for frontend rendering
+                analysis_data = AnalysisResult(
+                    conditions=[
+                        {
+                            "name": pred.get("condition", "Unknown"),
+                            "confidence": f"{pred.get('confidence', 0)*100:.1f}%",
+                            "reasoning": pred.get("reasoning", ""),
+                            "emergency": pred.get("emergency", False),
+                        }
+                        for pred in predictions[:3]
+                    ],
+                    severity=severity,
+                    urgency=urgency,
+                    red_flags=red_flags if red_flags else [],
+                    recommendations=recommendations if recommendations else [],
+                )
 
-                    # Add simple text to AI response
-                    ai_response += "\n\n📋 **Medical Analysis Complete**\n\nI've analyzed your symptoms. Please review the detailed results below."
+                # Add simple text to AI response
+                ai_response += "\n\n📋 **Medical Analysis Complete**\n\nI've analyzed your symptoms. Please review the detailed results below."
 
-                    # Update risk level based on analysis
-                    risk_level = "Green"
-                    if severity == "CRITICAL" or urgency == "EMERGENCY":
-                        risk_level = "Red"
-                    elif severity in ["HIGH", "MODERATE"] or urgency == "URGENT":
-                        risk_level = "Amber"
+                # Update risk level based on analysis
+                risk_level = "Green"
+                if severity == "CRITICAL" or urgency == "EMERGENCY":
+                    risk_level = "Red"
+                elif severity in ["HIGH", "MODERATE"] or urgency == "URGENT":
+                    risk_level = "Amber"
 
-                    # Use recommendations from medical analysis
-                    next_steps = recommendations
+                # Use recommendations from medical analysis
+                next_steps = recommendations
 
-                    logger.info(
-                        f"✅ Medical analysis complete: Severity={severity}, Urgency={urgency}"
-                    )
-                else:
-                    logger.warning(
-                        "⚠️ No symptoms extracted, continuing with AI response only"
-                    )
-                    # Use basic risk assessment
-                    risk_level = "Green"
-                    if any(
-                        word in request.question.lower()
-                        for word in [
-                            "severe",
-                            "extreme",
-                            "unbearable",
-                            "worst",
-                            "emergency",
-                        ]
-                    ):
-                        risk_level = "Amber"
-
-                    next_steps = [
-                        "Monitor your symptoms",
-                        "Consult healthcare provider if symptoms worsen",
-                        "Keep track of any changes",
+                logger.info(
+                    f"✅ Medical analysis complete: Severity={severity}, Urgency={urgency}"
+                )
+            else:
+                logger.warning(
+                    "⚠️ No symptoms extracted, continuing with AI response only"
+                )
+                # Use basic risk assessment
+                risk_level = "Green"
+                if any(
+                    word in request.question.lower()
+                    for word in [
+                        "severe",
+                        "extreme",
+                        "unbearable",
+                        "worst",
+                        "emergency",
                     ]
+                ):
+                    risk_level = "Amber"
 
-            except Exception as analysis_error:
-                logger.error(f"❌ Analysis error: {analysis_error}", exc_info=True)
-                # Fallback to basic assessment
-                risk_level = "Green"
                 next_steps = [
-                    "Monitor symptoms",
-                    "Consult healthcare provider if needed",
+                    "Monitor your symptoms",
+                    "Consult healthcare provider if symptoms worsen",
+                    "Keep track of any changes",
                 ]
-        else:
-            # Not ready for analysis - use basic risk assessment
+
+        except Exception as analysis_error:
+            logger.error(f"❌ Analysis error: {analysis_error}", exc_info=True)
+            # Fallback to basic assessment
             risk_level = "Green"
+            next_steps = [
+                "Monitor symptoms",
+                "Consult healthcare provider if needed",
+            ]
+    else:
+        # Not ready for analysis - use basic risk assessment
+        risk_level = "Green"
 
-            # Intelligent risk assessment based on keywords and context
-            question_lower = request.question.lower()
+        # Intelligent risk assessment based on keywords and context
+        question_lower = request.question.lower()
 
+        if any(
+            word in question_lower
+            for word in [
+                "severe",
+                "intense",
+                "unbearable",
+                "worst",
+                "can't breathe",
+                "chest pain",
+                "stroke",
+                "heart attack",
+                "bleeding heavily",
+            ]
+        ):
+            risk_level = "Amber"
+
+        if any(
+            word in question_lower for word in ["pain", "ache", "hurts", "sore"]
+        ):
             if any(
                 word in question_lower
-                for word in [
-                    "severe",
-                    "intense",
-                    "unbearable",
-                    "worst",
-                    "can't breathe",
-                    "chest pain",
-                    "stroke",
-                    "heart attack",
-                    "bleeding heavily",
-                ]
+                for word in ["severe", "intense", "10", "terrible"]
             ):
                 risk_level = "Amber"
 
-            if any(
-                word in question_lower for word in ["pain", "ache", "hurts", "sore"]
-            ):
-                if any(
-                    word in question_lower
-                    for word in ["severe", "intense", "10", "terrible"]
-                ):
-                    risk_level = "Amber"
+        # Generate context-appropriate next steps
+        if risk_level == "Amber":
+            next_steps = [
+                "Monitor symptoms closely",
+                "Consult healthcare provider soon",
+                "Seek immediate care if symptoms worsen",
+                "Keep track of all changes",
+            ]
+        else:
+            next_steps = [
+                "Follow the advice provided",
+                "Monitor your condition",
+                "Consult healthcare provider if symptoms worsen",
+            ]
 
-            # Generate context-appropriate next steps
-            if risk_level == "Amber":
-                next_steps = [
-                    "Monitor symptoms closely",
-                    "Consult healthcare provider soon",
-                    "Seek immediate care if symptoms worsen",
-                    "Keep track of all changes",
-                ]
-            else:
-                next_steps = [
-                    "Follow the advice provided",
-                    "Monitor your condition",
-                    "Consult healthcare provider if symptoms worsen",
-                ]
+    # Determine emotion based on situation
+    emotion = "supportive"
+    if risk_level == "Red":
+        emotion = "urgent"
+    elif risk_level == "Amber":
+        emotion = "concerned"
+    elif "student" in request.mode.lower():
+        emotion = "educational"
+
+    # Create intelligent summary
+    if intent == "symptom_analysis":
+        summary = f"Symptom discussion: {request.question[:50]}..."
+    elif intent == "report_analysis":
+        summary = f"Report analysis: {request.question[:50]}..."
+    elif request.student_mode:
+        summary = f"Educational response: {request.question[:50]}..."
+    else:
+        summary = f"Medical guidance: {request.question[:50]}..."
+
+    return FrontendChatResponse(
+        summary=summary,
+        answer=ai_response,
+        risk_level=risk_level,
+        confidence=f"{confidence:.2f}" if confidence else "High",
+        emotion=emotion,
+        next_steps=next_steps,
+        citations=[
+            "MedIntel AI (Groq - llama-3.3-70b)",
+            "Medical Knowledge Base",
+            "Clinical Guidelines",
+        ],
+        human_line=(
+            ai_response[:200] + "..." if len(ai_response) > 200 else ai_response
+        ),
+        raw_text=ai_response,
+        analysis=analysis_data,
+    )
 
-        # Determine emotion based on situation
-        emotion = "supportive"
-        if risk_level == "Red":
-            emotion = "urgent"
-        elif risk_level == "Amber":
-            emotion = "concerned"
-        elif "student" in request.mode.lower():
-            emotion = "educational"
-
-        # Create intelligent summary
-        if intent == "symptom_analysis":
-            summary = f"Symptom discussion: {request.question[:50]}..."
-        elif intent == "report_analysis":
-            summary = f"Report analysis: {request.question[:50]}..."
-        elif request.student_mode:
-            summary = f"Educational response: {request.question[:50]}..."
-        else:
-            summary = f"Medical guidance: {request.question[:50]}..."
 
-        return FrontendChatResponse(
-            summary=summary,
-            answer=ai_response,
-            risk_level=risk_level,
-            confidence=f"{confidence:.2f}" if confidence else "High",
-            emotion=emotion,
-            next_steps=next_steps,
-            citations=[
-                "MedIntel AI (Groq - llama-3.3-70b)",
-                "Medical Knowledge Base",
-                "Clinical Guidelines",
-            ],
-            human_line=(
-                ai_response[:200] + "..." if len(ai_response) > 200 else ai_response
-            ),
-            raw_text=ai_response,
-            analysis=analysis_data if "analysis_data" in locals() else None,
-        )
+@router.post("", response_model=FrontendChatResponse)
+async def chat_endpoint_for_frontend(request: FrontendChatRequest):
+    """
+    Main chat endpoint for React frontend - FULL BACKEND CAPABILITIES
+    Endpoint: POST /api/v1/chat
+
+    Features:
+    - Context-aware conversations (20-message history)
+    - Symptom extraction and analysis triggering
+    - Intent classification and smart routing
+    - Emergency detection with appropriate responses
+    - Intelligent risk assessment
+    - Report analysis integration
+    - Student mode for educational content
+    """
+    try:
+        logger.info(f"💬 Chat request: {request.question[:100]}")
+
+        # Check for emergency indicators FIRST
+        is_emergency = ConversationManager.check_emergency_indicators(request.question)
+
+        if is_emergency:
+            logger.warning(f"🚨 EMERGENCY detected: {request.question[:50]}")
+            return _build_emergency_frontend_response()
+
+        # Get conversational AI instance
+        ai = ConversationalAI.get_instance()
+
+        # Build full context for the conversation
+        context = _build_chat_context(request)
+
+        # Turns on one session run in order, so none is lost to a concurrent save
+        async with session_store.turn_lock(request.session_id):
+            # Generate intelligent AI response with FULL conversation history
+            session, conversation_history, summary = _resolve_conversation(request)
+            logger.info(
+                f"📚 Using conversation history: {len(conversation_history)} messages"
+            )
+
+            try:
+                ai_response = await ai.generate_response(
+                    user_message=request.question,
+                    conversation_history=conversation_history,
+                    context=context,
+                    summary=summary,
+                )
+                using_fallback = False
+            except Exception as ai_error:
+                # Check if it's a rate limit error
+                if "rate_limit" in str(ai_error).lower() or "429" in str(ai_error):
+                    logger.warning(
+                        f"⚠️ Groq API rate limit - using intelligent fallback"
+                    )
+                    using_fallback = True
+                else:
+                    logger.error(f"❌ AI error: {ai_error}")
+                    using_fallback = True
+
+                # Generate response using fallback
+                ai_response = ai._fallback_response(
+                    request.question, conversation_history, context
+                )
+
+            response = await _finalize_frontend_response(
+                request, ai_response, conversation_history, session
+            )
+            _record_turn(session, conversation_history, request.question, ai_response)
+
+        return response
 
     except Exception as e:
         logger.error(f"❌ Error in chat endpoint: {e}", exc_info=True)
@@ -1597,6 +1705,72 @@ async def chat_endpoint_for_frontend(request: FrontendChatRequest):
         )
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def chat_stream_for_frontend(request: FrontendChatRequest):
+    """
+    Streaming variant of the main chat endpoint (Server-Sent Events)
+    Endpoint: POST /api/v1/chat/stream
+
+    Events:
+    - token: {"delta": "..."} for each chunk of the answer as it is generated
+    - final: the complete FrontendChatResponse (risk_level, next_steps, analysis)
+    - error: {"message": "..."} if the request fails mid-stream
+
+    Emergency messages skip generation and send the final event immediately.
+    """
+    logger.info(f"💬 Streaming chat request: {request.question[:100]}")
+
+    async def event_stream():
+        try:
+            # Check for emergency indicators FIRST
+            if ConversationManager.check_emergency_indicators(request.question):
+                logger.warning(f"🚨 EMERGENCY detected: {request.question[:50]}")
+                yield _sse_event(
+                    "final", _build_emergency_frontend_response().model_dump()
+                )
+                return
+
+            ai = ConversationalAI.get_instance()
+            context = _build_chat_context(request)
+
+            async with session_store.turn_lock(request.session_id):
+                session, conversation_history, summary = _resolve_conversation(request)
+
+                answer_parts = []
+                async for delta in ai.stream_response(
+                    user_message=request.question,
+                    conversation_history=conversation_history,
+                    context=context,
+                    summary=summary,
+                ):
+                    answer_parts.append(delta)
+                    yield _sse_event("token", {"delta": delta})
+
+                ai_response = "".join(answer_parts).strip()
+                response = await _finalize_frontend_response(
+                    request, ai_response, conversation_history, session
+                )
+                _record_turn(
+                    session, conversation_history, request.question, ai_response
+                )
+            yield _sse_event("final", response.model_dump())
+
+        except Exception as e:
+            logger.error(f"❌ Error in streaming chat endpoint: {e}", exc_info=True)
+            yield _sse_event("error", {"message": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/message", response_model=ChatResponse)
 async def process_chat_message(request: ChatRequest):
     """
@@ -1624,7 +1798,7 @@ async def process_chat_message(request: ChatRequest):
         ai = ConversationalAI.get_instance()
 
         # Generate AI response with full context
-        ai_response = ai.generate_response(
+        ai_response = await ai.generate_response(
             user_message=request.message,
             conversation_history=request.conversation_history,
             context=request.patient_context,
@@ -1730,7 +1904,7 @@ async def analyze_symptoms_from_conversation(request: dict):
 
         # Step 1: Extract structured symptom data using AI
         ai = ConversationalAI.get_instance()
-        symptom_data = ai.extract_symptoms_from_conversation(conversation_history)
+        symptom_data = await ai.extract_symptoms_from_conversation(conversation_history)
 
         # Ensure symptom_data is not None
         if symptom_data is None:
@@ -1738,14 +1912,8 @@ async def analyze_symptoms_from_conversation(request: dict):
 
         logger.info(f"📊 Extracted symptoms: {symptom_data.get('symptoms', [])}")
 
-        # Step 2: Import medical analysis functions directly
-        from api.symptom_checker import (
-            _assess_severity,
-            _assess_urgency,
-            _check_red_flags,
-            _generate_recommendations,
-            _predict_conditions,
-        )
+        # Step 2: Import medical analysis pipeline directly
+        from api.symptom_checker import run_symptom_analysis
 
         symptoms_list = symptom_data.get("symptoms", [])
 
@@ -1758,11 +1926,12 @@ async def analyze_symptoms_from_conversation(request: dict):
         # Step 3: Run through medical analysis functions
         logger.info("🏥 Running medical analysis with medical system")
 
-        predictions = _predict_conditions(symptoms_list)
-        severity = _assess_severity(symptoms_list, predictions)
-        urgency = _assess_urgency(symptoms_list, predictions)
-        recommendations = _generate_recommendations(severity, urgency)
-        red_flags = _check_red_flags(symptoms_list)
+        analysis = await run_symptom_analysis(symptoms_list)
+        predictions = analysis["predictions"]
+        severity = analysis["severity"]
+        urgency = analysis["urgency"]
+        recommendations = analysis["recommendations"]
+        red_flags = analysis["red_flags"]
 
         # Build medical analysis response
         medical_analysis = {
@@ -1851,7 +2020,18 @@ async def get_conversation_summary(conversation_id: Optional[str] = None):
     and recommended next steps.
     """
     try:
-        # In production, would retrieve actual conversation from database
+        session = session_store.get(conversation_id) if conversation_id else None
+        if session is not None:
+            return {
+                "summary": session.summary or "Conversation in progress",
+                "message_count": len(session.history),
+                "symptoms": session.symptoms,
+                "recommendations": [
+                    "Continue monitoring symptoms",
+                    "Consider scheduling follow-up with healthcare provider",
+                ],
+                "next_steps": "Further discussion needed",
+            }
 
         return {
             "summary": "Conversation summary feature",
@@ -8,6 +8,7 @@ from typing import Dict
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
 from services.medical_imaging import medical_imaging_analyzer
+from services.upload_handler import UploadTooLarge, receive_upload
 
 logger = logging.getLogger(__name__)
 
@@ -30,20 +31,19 @@ async def analyze_medical_image(
         Analysis results with findings, confidence, and recommendations
     """
     try:
-        # Validate file type
-        if not file.content_type or not file.content_type.startswith("image/"):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid file type. Please upload an image file (JPEG, PNG).",
-            )
-
-        # Read image content
-        image_content = await file.read()
-
-        if len(image_content) == 0:
-            raise HTTPException(
-                status_code=400, detail="Empty file uploaded. Please try again."
-            )
+        # Stream the upload (rejects oversized files early, detects the real type)
+        try:
+            with await receive_upload(file) as upload:
+                if not upload.is_image:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Invalid file type. Please upload an image file (JPEG, PNG).",
+                    )
+                image_content = upload.read()
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
         logger.info(
             f"📸 Analyzing {image_type} image: {file.filename} ({len(image_content)} bytes)"
@@ -3,11 +3,22 @@ OCR and Document Processing Service
 Handles extraction of text from images, PDFs, and documents
 """
 
+import asyncio
+import json
 import logging
+from typing import List
 
+from config import MAX_UPLOAD_SIZE, OCR_BATCH_MAX_BYTES, OCR_BATCH_MAX_FILES
 from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.document_processor import document_processor
+from services.document_processor import document_processor, extraction_cache
+from services.extraction_pool import (
+    ExtractionQueueFull,
+    ExtractionTimeout,
+    extraction_pool,
+)
+from services.upload_handler import UploadTooLarge, expand_zip_upload, receive_upload
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +32,59 @@ class DocumentExtractionResponse(BaseModel):
     text: str
     filename: str
     page_count: int = 1
+    pages: List[dict] = []  # Per-page type (text/image/mixed) and source (text/ocr)
+    failed_pages: List[int] = []  # PDF pages whose OCR failed (text is incomplete)
     extraction_method: str
     error: str = None
 
 
+def _build_extraction_response(
+    filename: str, extension: str, document: dict
+) -> DocumentExtractionResponse:
+    """Turn an extracted document into the API response"""
+    extracted_text = document["text"]
+
+    if not extracted_text or len(extracted_text.strip()) < 10:
+        return DocumentExtractionResponse(
+            success=False,
+            text="",
+            filename=filename,
+            extraction_method="none",
+            error="Could not extract meaningful text from document. File may be empty or corrupted.",
+        )
+
+    # Determine extraction method
+    ext = extension.lstrip(".")
+    method_map = {
+        "pdf": "PDF text extraction",
+        "jpg": "OCR (Image)",
+        "jpeg": "OCR (Image)",
+        "png": "OCR (Image)",
+        "bmp": "OCR (Image)",
+        "tiff": "OCR (Image)",
+        "docx": "DOCX text extraction",
+        "doc": "DOC text extraction",
+        "txt": "Plain text",
+    }
+
+    extraction_method = method_map.get(ext, "Unknown")
+    if ext == "pdf":
+        used_text = any("text" in page["source"] for page in document["pages"])
+        used_ocr = any("ocr" in page["source"] for page in document["pages"])
+        if used_ocr:
+            extraction_method = "PDF text extraction + OCR" if used_text else "OCR (PDF)"
+
+    return DocumentExtractionResponse(
+        success=True,
+        text=extracted_text,
+        filename=filename,
+        page_count=document["page_count"],
+        pages=document["pages"],
+        failed_pages=document.get("failed_pages", []),
+        extraction_method=extraction_method,
+    )
+
+
 @router.post("/ocr/extract", response_model=DocumentExtractionResponse)
 async def extract_document_text(file: UploadFile = File(...)):
     """
@@ -37,51 +97,30 @@ async def extract_document_text(file: UploadFile = File(...)):
     try:
         logger.info(f"📄 Processing document: {file.filename}")
 
-        # Read file content
-        content = await file.read()
-
-        # Extract text using document processor
-        extracted_text = await document_processor.extract_text(content, file.filename)
-
-        if not extracted_text or len(extracted_text.strip()) < 10:
-            return DocumentExtractionResponse(
-                success=False,
-                text="",
-                filename=file.filename,
-                extraction_method="none",
-                error="Could not extract meaningful text from document. File may be empty or corrupted.",
+        # Stream the upload (rejects oversized files early, detects the real type)
+        with await receive_upload(file) as upload:
+            document = await document_processor.extract_document(
+                upload.read(), upload.typed_filename, content_hash=upload.sha256
             )
 
-        # Determine extraction method
-        ext = file.filename.lower().split(".")[-1]
-        method_map = {
-            "pdf": "PDF text extraction",
-            "jpg": "OCR (Image)",
-            "jpeg": "OCR (Image)",
-            "png": "OCR (Image)",
-            "bmp": "OCR (Image)",
-            "tiff": "OCR (Image)",
-            "docx": "DOCX text extraction",
-            "doc": "DOC text extraction",
-            "txt": "Plain text",
-        }
-
-        extraction_method = method_map.get(ext, "Unknown")
-
-        logger.info(
-            f"✅ Successfully extracted {len(extracted_text)} characters from {file.filename}"
-        )
-
-        return DocumentExtractionResponse(
-            success=True,
-            text=extracted_text,
-            filename=file.filename,
-            extraction_method=extraction_method,
-        )
+        response = _build_extraction_response(file.filename, upload.extension, document)
+        if response.success:
+            logger.info(
+                f"✅ Successfully extracted {len(response.text)} characters from {file.filename}"
+            )
+        return response
 
+    except UploadTooLarge as e:
+        logger.warning(f"⚠️ Upload rejected: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         logger.error(f"❌ Unsupported file format: {e}")
         raise HTTPException(status_code=400, detail=str(e))
+    except ExtractionQueueFull as e:
+        logger.warning(f"⚠️ Extraction pool saturated: {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except RuntimeError as e:
         logger.error(f"❌ Processing error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -92,6 +131,113 @@ async def extract_document_text(file: UploadFile = File(...)):
         )
 
 
+@router.post("/ocr/extract/batch")
+async def extract_documents_batch(files: List[UploadFile] = File(...)):
+    """
+    Extract text from many documents in one request
+
+    - **files**: Document files (PDF, JPG, PNG, DOCX, TXT) and/or ZIP archives
+      of them (e.g. a patient's folder)
+
+    Files are spread across the extraction worker pool and results are
+    streamed back as newline-delimited JSON, one line per file in
+    completion order (each with its "index" in the batch), followed by a
+    final {"complete": true, ...} summary line.
+    """
+    items = []  # (filename, SpooledUpload or the exception it failed with)
+    try:
+        for file in files:
+            is_zip = (file.filename or "").lower().endswith(".zip")
+            try:
+                upload = await receive_upload(
+                    file, max_size=OCR_BATCH_MAX_BYTES if is_zip else MAX_UPLOAD_SIZE
+                )
+            except ValueError as e:
+                items.append((file.filename, e))
+                continue
+
+            if upload.extension == ".zip":
+                with upload:
+                    remaining = OCR_BATCH_MAX_FILES - len(items)
+                    items.extend(expand_zip_upload(upload, max_files=remaining))
+            else:
+                items.append((file.filename, upload))
+
+            if len(items) > OCR_BATCH_MAX_FILES:
+                raise ValueError(f"Too many files (maximum {OCR_BATCH_MAX_FILES})")
+    except Exception as e:
+        _close_batch_items(items)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"📚 Batch extraction of {len(items)} documents")
+    return StreamingResponse(
+        _stream_batch_results(items), media_type="application/x-ndjson"
+    )
+
+
+async def _stream_batch_results(items: list):
+    """Extract every item through the worker pool, yielding results as they finish"""
+    # One request should not claim more than the pool can run at once
+    semaphore = asyncio.Semaphore(extraction_pool.max_workers)
+
+    def failure(index: int, filename: str, status: int, error: str) -> dict:
+        return {
+            "index": index,
+            "filename": filename,
+            "success": False,
+            "status": status,
+            "error": error,
+        }
+
+    async def extract(index: int, filename: str, upload) -> dict:
+        if isinstance(upload, Exception):
+            status = 413 if isinstance(upload, UploadTooLarge) else 400
+            return failure(index, filename, status, str(upload))
+
+        async with semaphore:
+            try:
+                document = await document_processor.extract_document(
+                    upload.read(), upload.typed_filename, content_hash=upload.sha256
+                )
+                response = _build_extraction_response(filename, upload.extension, document)
+                return {"index": index, **response.model_dump(), "status": 200}
+            except ExtractionQueueFull as e:
+                status, error = 429, str(e)
+            except ExtractionTimeout as e:
+                status, error = 504, str(e)
+            except ValueError as e:
+                status, error = 400, str(e)
+            except Exception as e:
+                logger.error(f"❌ Batch extraction failed for {filename}: {e}")
+                status, error = 500, str(e)
+            return failure(index, filename, status, error)
+
+    tasks = [
+        asyncio.create_task(extract(index, filename, upload))
+        for index, (filename, upload) in enumerate(items)
+    ]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += bool(result.get("success"))
+            yield json.dumps(result) + "\n"
+
+        yield json.dumps(
+            {"complete": True, "total": len(items), "succeeded": succeeded}
+        ) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        _close_batch_items(items)
+
+
+def _close_batch_items(items: list):
+    for _, upload in items:
+        if not isinstance(upload, Exception):
+            upload.close()
+
+
 @router.post("/ocr/prescription")
 async def read_prescription(file: UploadFile = File(...)):
     """
@@ -101,3 +247,9 @@ async def read_prescription(file: UploadFile = File(...)):
     - **file**: Image file of prescription
     """
     return await extract_document_text(file)
+
+
+@router.get("/ocr/cache")
+async def get_extraction_cache_stats():
+    """Hit/miss statistics for the document extraction cache"""
+    return extraction_cache.stats()
@@ -19,6 +19,8 @@ class ReportAnalysisRequest(BaseModel):
 
     report_text: str
     patient_id: Optional[str] = None
+    patient_sex: Optional[str] = None  # Selects sex-specific lab reference ranges
+    patient_age: Optional[float] = None  # Selects age-specific lab reference ranges
 
 
 class ReportAnalysisResponse(BaseModel):
@@ -33,6 +35,10 @@ class ReportAnalysisResponse(BaseModel):
     explanation: Optional[str] = None
     severity: Optional[str] = None
     recommendations: Optional[list] = None
+    partial: bool = False  # Long report analysed from only some of its chunks
+    chunks_analyzed: Optional[int] = None
+    chunks_total: Optional[int] = None
+    degraded: bool = False  # Local analysis timed out: lab values only, no entities
     error: Optional[str] = None
 
 
@@ -43,6 +49,7 @@ async def analyze_report(request: ReportAnalysisRequest):
 
     - **report_text**: The text content of the medical report
     - **patient_id**: Optional patient identifier
+    - **patient_sex** / **patient_age**: Optional, for sex/age-specific lab ranges
     """
     try:
         logger.info(f"📄 Analyzing report (length: {len(request.report_text)} chars)")
@@ -51,7 +58,9 @@ async def analyze_report(request: ReportAnalysisRequest):
             raise HTTPException(status_code=400, detail="Report text is too short")
 
         # Analyze the report
-        result = report_analyzer.analyze_report(request.report_text)
+        result = await report_analyzer.analyze_report(
+            request.report_text, request.patient_sex, request.patient_age
+        )
 
         if not result["success"]:
             raise HTTPException(
@@ -79,16 +88,26 @@ async def analyze_report_file(file: UploadFile = File(...)):
     try:
         logger.info(f"📁 Analyzing uploaded file: {file.filename}")
 
-        # Read file content
-        content = await file.read()
-
         # Use document processor to extract text
         from services.document_processor import document_processor
+        from services.extraction_pool import ExtractionQueueFull, ExtractionTimeout
+        from services.upload_handler import UploadTooLarge, receive_upload
 
         try:
-            text = await document_processor.extract_text(content, file.filename)
+            # Stream the upload (rejects oversized files early, detects the real type)
+            with await receive_upload(file) as upload:
+                document = await document_processor.extract_document(
+                    upload.read(), upload.typed_filename, content_hash=upload.sha256
+                )
+            text = document["text"]
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        except ExtractionQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+        except ExtractionTimeout as e:
+            raise HTTPException(status_code=504, detail=str(e))
         except RuntimeError as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -101,7 +120,7 @@ async def analyze_report_file(file: UploadFile = File(...)):
         logger.info(f"✅ Extracted {len(text)} characters from {file.filename}")
 
         # Analyze the report
-        result = report_analyzer.analyze_report(text)
+        result = await report_analyzer.analyze_report(text)
 
         if not result["success"]:
             raise HTTPException(
@@ -138,5 +157,5 @@ async def get_sample_analysis():
     Medications: Metformin 500mg twice daily, Atorvastatin 20mg once daily
     """
 
-    result = report_analyzer.analyze_report(sample_report)
+    result = await report_analyzer.analyze_report(sample_report)
     return ReportAnalysisResponse(**result)
@@ -2,16 +2,53 @@
 API Endpoints for Symptom Checking and Disease Prediction
 """
 
+import asyncio
+import json
 import logging
+import re
 from typing import List, Optional
 
+from config import (
+    CACHE_DIR,
+    GROQ_MODEL,
+    SYMPTOM_ANALYSIS_DEADLINE,
+    SYMPTOM_CACHE_DISK_ENABLED,
+    SYMPTOM_CACHE_DISK_MAX_BYTES,
+    SYMPTOM_CACHE_MAX_ENTRIES,
+    SYMPTOM_CACHE_TTL_SECONDS,
+    SYMPTOM_FUSED_DEADLINE_FRACTION,
+    SYMPTOM_MIN_AI_SECONDS,
+    SYMPTOM_TRIAGE_MODE,
+)
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from services.cache import DiskCache, LRUCache, TieredCache, make_cache_key
+from services.llm_client import llm_client
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Bump when a prompt changes so cached responses from the old prompt are not reused
+CONDITIONS_PROMPT_VERSION = "1"
+RED_FLAGS_PROMPT_VERSION = "1"
+TRIAGE_PROMPT_VERSION = "1"
+
+# Cache of deterministic LLM responses keyed by normalized symptom set
+symptom_cache = TieredCache(
+    "symptoms",
+    LRUCache(SYMPTOM_CACHE_MAX_ENTRIES, SYMPTOM_CACHE_TTL_SECONDS),
+    (
+        DiskCache(
+            CACHE_DIR / "symptoms",
+            SYMPTOM_CACHE_TTL_SECONDS,
+            max_bytes=SYMPTOM_CACHE_DISK_MAX_BYTES,
+        )
+        if SYMPTOM_CACHE_DISK_ENABLED
+        else None
+    ),
+)
+
 
 def _is_emergency_condition(condition: str) -> bool:
     """Check if a medical condition is an emergency"""
@@ -88,20 +125,16 @@ async def check_symptoms(request: SymptomCheckRequest):
         if not request.symptoms or len(request.symptoms) == 0:
             raise HTTPException(status_code=400, detail="No symptoms provided")
 
-        # Simple symptom matching (will be enhanced with ML later)
-        predictions = _predict_conditions(request.symptoms)
-        severity = _assess_severity(request.symptoms, predictions)
-        urgency = _assess_urgency(request.symptoms, predictions)
-        recommendations = _generate_recommendations(severity, urgency)
-        red_flags = _check_red_flags(request.symptoms)
+        # Condition prediction and red flag detection run concurrently
+        analysis = await run_symptom_analysis(request.symptoms)
 
         return SymptomCheckResponse(
             success=True,
-            predictions=predictions,
-            severity=severity,
-            urgency=urgency,
-            recommendations=recommendations,
-            red_flags=red_flags,
+            predictions=analysis["predictions"],
+            severity=analysis["severity"],
+            urgency=analysis["urgency"],
+            recommendations=analysis["recommendations"],
+            red_flags=analysis["red_flags"],
         )
 
     except HTTPException:
@@ -111,27 +144,14 @@ async def check_symptoms(request: SymptomCheckRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-def _predict_conditions(symptoms: List[str]) -> List[dict]:
-    """
-    Predict possible conditions using AI-powered medical knowledge
-    Uses BioBERT/ClinicalBERT for intelligent analysis
-    """
-    # Convert symptoms to lowercase for matching
-    symptoms_lower = [s.lower() for s in symptoms]
-    symptoms_text = " ".join(symptoms_lower)
-
-    # PRIMARY: Use Groq AI for intelligent medical analysis
-    try:
-        import os
-
-        from groq import Groq
-
-        api_key = os.getenv("GROQ_API_KEY", "")
+def _normalize_symptoms(symptoms: List[str]) -> List[str]:
+    """Lower-case, trim, de-duplicate and sort symptoms (cache key and prompt order)"""
+    return sorted({" ".join(s.lower().split()) for s in symptoms if s and s.strip()})
 
-        if api_key:
-            client = Groq(api_key=api_key)
 
-            medical_prompt = f"""You are a medical AI assistant. Analyze these symptoms and provide possible conditions.
+def _build_conditions_prompt(symptoms_text: str) -> str:
+    """Prompt for AI condition prediction"""
+    return f"""You are a medical AI assistant. Analyze these symptoms and provide possible conditions.
 
 Symptoms: {symptoms_text}
 
@@ -155,42 +175,78 @@ Consider:
 
 Return ONLY the JSON, no markdown or other text."""
 
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": medical_prompt}],
-                temperature=0.3,
-                max_tokens=1000,
-            )
 
-            import json
-            import re
-
-            ai_response = response.choices[0].message.content.strip()
-            logger.info(f"🧠 AI medical analysis: {ai_response[:200]}...")
-
-            # Extract JSON from response
-            json_match = re.search(r"\{.*\}", ai_response, re.DOTALL)
-            if json_match:
-                analysis = json.loads(json_match.group())
-
-                if analysis.get("conditions"):
-                    predictions = []
-                    for cond in analysis["conditions"]:
-                        predictions.append(
-                            {
-                                "condition": cond["condition"],
-                                "confidence": cond["confidence"],
-                                "emergency": cond.get("emergency", False),
-                                "matching_symptoms": symptoms_lower,
-                            }
-                        )
-                    logger.info(
-                        f"✅ AI analysis returned {len(predictions)} conditions"
+async def _predict_conditions_with_ai(symptoms: List[str]) -> Optional[List[dict]]:
+    """
+    Predict conditions with Groq AI, served from the response cache when the
+    same normalized symptom set was analyzed before
+
+    Returns None when AI is unavailable or the response cannot be parsed
+    """
+    if not llm_client.available:
+        return None
+
+    normalized = _normalize_symptoms(symptoms)
+    cache_key = make_cache_key(
+        "conditions", normalized, GROQ_MODEL, CONDITIONS_PROMPT_VERSION
+    )
+    cached = symptom_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"⚡ Condition predictions served from cache ({len(cached)})")
+        return cached
+
+    try:
+        ai_response = await llm_client.chat_completion(
+            "symptoms",
+            [{"role": "user", "content": _build_conditions_prompt(" ".join(normalized))}],
+            temperature=0.3,
+            max_tokens=1000,
+        )
+        logger.info(f"🧠 AI medical analysis: {ai_response[:200]}...")
+
+        # Extract JSON from response
+        json_match = re.search(r"\{.*\}", ai_response, re.DOTALL)
+        if json_match:
+            analysis = json.loads(json_match.group())
+
+            if analysis.get("conditions"):
+                predictions = []
+                for cond in analysis["conditions"]:
+                    predictions.append(
+                        {
+                            "condition": cond["condition"],
+                            "confidence": cond["confidence"],
+                            "emergency": cond.get("emergency", False),
+                            "matching_symptoms": normalized,
+                        }
                     )
-                    return predictions
+                logger.info(f"✅ AI analysis returned {len(predictions)} conditions")
+                symptom_cache.set(cache_key, predictions)
+                return predictions
     except Exception as e:
         logger.warning(f"⚠️ Groq AI analysis failed, using fallback: {e}")
-        # Continue to fallback logic below
+
+    return None
+
+
+async def _predict_conditions(symptoms: List[str]) -> List[dict]:
+    """
+    Predict possible conditions using AI-powered medical knowledge
+    Uses BioBERT/ClinicalBERT for intelligent analysis
+    """
+    # PRIMARY: Use Groq AI for intelligent medical analysis
+    predictions = await _predict_conditions_with_ai(symptoms)
+    if predictions:
+        return predictions
+
+    return _predict_conditions_fallback(symptoms)
+
+
+def _predict_conditions_fallback(symptoms: List[str]) -> List[dict]:
+    """Rule-based condition prediction used when AI analysis is unavailable"""
+    # Convert symptoms to lowercase for matching
+    symptoms_lower = [s.lower() for s in symptoms]
+    symptoms_text = " ".join(symptoms_lower)
 
     # PRIORITY 1: Check for specific emergencies and injuries (exact matches override everything)
     emergency_keywords = {
@@ -618,37 +674,24 @@ def _generate_recommendations(severity: str, urgency: str) -> List[str]:
     return recommendations
 
 
-def _check_red_flags(symptoms: List[str]) -> List[str]:
-    """Check for red flag symptoms using AI analysis"""
-    symptoms_lower = [s.lower() for s in symptoms]
-
-    # Critical red flag patterns to always check
-    critical_patterns = {
-        "chest pain": "Chest pain can indicate heart attack or other serious cardiac conditions",
-        "difficulty breathing": "Breathing difficulty requires immediate medical attention",
-        "shortness of breath": "Breathing difficulty requires immediate medical attention",
-        "severe headache": "Severe headache may indicate serious neurological condition",
-        "loss of consciousness": "Loss of consciousness is a medical emergency",
-        "severe bleeding": "Severe bleeding requires immediate emergency care",
-        "suicidal thoughts": "Call 988 (Suicide Prevention Hotline) immediately",
-        "confusion": "Confusion may indicate serious neurological or metabolic condition",
-        "stiff neck": "Stiff neck with fever may indicate meningitis",
-        "seizure": "Seizures require immediate medical evaluation",
-    }
-
-    detected_flags = []
+# Critical red flag patterns to always check
+CRITICAL_RED_FLAG_PATTERNS = {
+    "chest pain": "Chest pain can indicate heart attack or other serious cardiac conditions",
+    "difficulty breathing": "Breathing difficulty requires immediate medical attention",
+    "shortness of breath": "Breathing difficulty requires immediate medical attention",
+    "severe headache": "Severe headache may indicate serious neurological condition",
+    "loss of consciousness": "Loss of consciousness is a medical emergency",
+    "severe bleeding": "Severe bleeding requires immediate emergency care",
+    "suicidal thoughts": "Call 988 (Suicide Prevention Hotline) immediately",
+    "confusion": "Confusion may indicate serious neurological or metabolic condition",
+    "stiff neck": "Stiff neck with fever may indicate meningitis",
+    "seizure": "Seizures require immediate medical evaluation",
+}
 
-    # First check pattern matching
-    for symptom in symptoms_lower:
-        for flag, message in critical_patterns.items():
-            if flag in symptom:
-                detected_flags.append(f"⚠️ {flag.upper()}: {message}")
 
-    # Use AI to detect additional red flags based on symptom combination
-    try:
-        client = Groq(api_key=os.getenv("GROQ_API_KEY", ""))
-
-        prompt = f"""Given these symptoms: {', '.join(symptoms)}
+def _build_red_flags_prompt(symptoms: List[str]) -> str:
+    """Prompt for AI red flag detection"""
+    return f"""Given these symptoms: {', '.join(symptoms)}
 
 Identify any RED FLAG symptoms or dangerous symptom combinations that require immediate medical attention.
 
@@ -665,30 +708,58 @@ Example: ["FEVER + STIFF NECK + CONFUSION: Possible meningitis - life-threatenin
 
 Return empty array [] if no red flags detected."""
 
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
+
+def _pattern_red_flags(symptoms: List[str]) -> List[str]:
+    """Red flags from the fixed critical pattern list"""
+    detected_flags = []
+    for symptom in (s.lower() for s in symptoms):
+        for flag, message in CRITICAL_RED_FLAG_PATTERNS.items():
+            if flag in symptom:
+                detected_flags.append(f"⚠️ {flag.upper()}: {message}")
+    return detected_flags
+
+
+async def _ai_red_flags(symptoms: List[str]) -> List[str]:
+    """Red flags for symptom combinations detected by Groq AI (cached)"""
+    if not llm_client.available:
+        return []
+
+    normalized = _normalize_symptoms(symptoms)
+    cache_key = make_cache_key(
+        "red_flags", normalized, GROQ_MODEL, RED_FLAGS_PROMPT_VERSION
+    )
+    cached = symptom_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        ai_flags_text = await llm_client.chat_completion(
+            "symptoms",
+            [{"role": "user", "content": _build_red_flags_prompt(normalized)}],
             temperature=0.1,
             max_tokens=300,
         )
 
-        ai_flags_text = response.choices[0].message.content.strip()
-
-        # Parse JSON response
-        import json
-        import re
-
         # Extract JSON array from response
         json_match = re.search(r"\[.*\]", ai_flags_text, re.DOTALL)
         if json_match:
-            ai_flags = json.loads(json_match.group())
-            for flag in ai_flags:
-                if flag and flag not in detected_flags:
-                    detected_flags.append(f"⚠️ {flag}")
+            ai_flags = [flag for flag in json.loads(json_match.group()) if flag]
+            symptom_cache.set(cache_key, ai_flags)
+            return ai_flags
 
     except Exception as e:
         logger.warning(f"⚠️ AI red flag detection failed: {e}")
 
+    return []
+
+
+def _merge_red_flags(pattern_flags: List[str], ai_flags: List[str]) -> List[str]:
+    """Combine pattern and AI red flags, de-duplicated by their label"""
+    detected_flags = list(pattern_flags)
+    for flag in ai_flags:
+        if flag not in detected_flags:
+            detected_flags.append(f"⚠️ {flag}")
+
     # Remove duplicates while preserving order
     seen = set()
     unique_flags = []
@@ -701,6 +772,196 @@ Return empty array [] if no red flags detected."""
     return unique_flags[:5]  # Limit to top 5 most critical flags
 
 
+async def _check_red_flags(symptoms: List[str]) -> List[str]:
+    """Check for red flag symptoms using AI analysis"""
+    return _merge_red_flags(_pattern_red_flags(symptoms), await _ai_red_flags(symptoms))
+
+
+def _build_triage_prompt(symptoms_text: str) -> str:
+    """Prompt for fused triage: conditions and red flags in one response"""
+    return f"""You are a medical AI assistant. Analyze these symptoms for possible conditions and red flags.
+
+Symptoms: {symptoms_text}
+
+Provide your response in this EXACT JSON format (return ONLY valid JSON, no other text):
+{{
+  "conditions": [
+    {{
+      "condition": "condition name",
+      "confidence": 0.0-1.0,
+      "emergency": true/false,
+      "reasoning": "brief explanation"
+    }}
+  ],
+  "red_flags": ["SYMPTOM/PATTERN: Brief reason for urgency"]
+}}
+
+Conditions:
+- Specific injuries/events (snake bite, trauma, etc.) have priority
+- Context matters (e.g., "snake bite" means venomous bite injury, not respiratory infection)
+- Emergency conditions should be flagged
+- Provide 3-5 most likely conditions ranked by confidence
+
+Red flags:
+- Only true medical emergencies or dangerous symptom combinations (e.g., fever + stiff neck + confusion = possible meningitis)
+- Be specific about WHY it's a red flag
+- Maximum 3-4 red flags, empty array [] if none
+
+Return ONLY the JSON, no markdown or other text."""
+
+
+async def _fused_triage_with_ai(symptoms: List[str]) -> Optional[dict]:
+    """
+    Predict conditions and red flags with a single Groq call (cached)
+
+    Returns {"predictions": [...], "red_flags": [...]}, or None when AI is
+    unavailable or the response does not parse
+    """
+    if not llm_client.available:
+        return None
+
+    normalized = _normalize_symptoms(symptoms)
+    cache_key = make_cache_key("triage", normalized, GROQ_MODEL, TRIAGE_PROMPT_VERSION)
+    cached = symptom_cache.get(cache_key)
+    if cached is not None:
+        logger.info("⚡ Triage served from cache")
+        return cached
+
+    try:
+        ai_response = await llm_client.chat_completion(
+            "symptoms",
+            [{"role": "user", "content": _build_triage_prompt(" ".join(normalized))}],
+            temperature=0.1,
+            max_tokens=1200,
+        )
+
+        json_match = re.search(r"\{.*\}", ai_response, re.DOTALL)
+        if not json_match:
+            logger.warning("⚠️ No JSON found in fused triage response")
+            return None
+
+        analysis = json.loads(json_match.group())
+        conditions = analysis.get("conditions")
+        red_flags = analysis.get("red_flags", [])
+        if not conditions or not isinstance(red_flags, list):
+            logger.warning("⚠️ Fused triage response is missing required fields")
+            return None
+
+        triage = {
+            "predictions": [
+                {
+                    "condition": cond["condition"],
+                    "confidence": cond["confidence"],
+                    "emergency": cond.get("emergency", False),
+                    "matching_symptoms": normalized,
+                }
+                for cond in conditions
+            ],
+            "red_flags": [flag for flag in red_flags if flag],
+        }
+        logger.info(
+            f"✅ Fused triage returned {len(triage['predictions'])} conditions, "
+            f"{len(triage['red_flags'])} red flags"
+        )
+        symptom_cache.set(cache_key, triage)
+        return triage
+
+    except Exception as e:
+        logger.warning(f"⚠️ Fused triage failed: {e}")
+        return None
+
+
+def _build_symptom_analysis(
+    symptoms: List[str], predictions: List[dict], ai_flags: List[str], partial: bool
+) -> dict:
+    """Assemble severity, urgency and recommendations around the AI stage results"""
+    severity = _assess_severity(symptoms, predictions)
+    urgency = _assess_urgency(symptoms, predictions)
+
+    return {
+        "predictions": predictions,
+        "severity": severity,
+        "urgency": urgency,
+        "recommendations": _generate_recommendations(severity, urgency),
+        "red_flags": _merge_red_flags(_pattern_red_flags(symptoms), ai_flags),
+        "partial": partial,
+    }
+
+
+async def run_symptom_analysis(
+    symptoms: List[str], deadline: float = SYMPTOM_ANALYSIS_DEADLINE
+) -> dict:
+    """
+    Run the full symptom analysis pipeline
+
+    In "fused" triage mode one Groq call returns both conditions and red
+    flags, given SYMPTOM_FUSED_DEADLINE_FRACTION of the deadline. Otherwise,
+    or if the fused call fails or times out, condition prediction and red
+    flag detection run as two concurrent calls under the remaining deadline
+    (skipped when less than SYMPTOM_MIN_AI_SECONDS is left). A stage that
+    fails or misses the deadline falls back to its rule-based result instead
+    of failing the whole analysis.
+
+    Returns:
+        Dict with predictions, severity, urgency, recommendations, red_flags
+        and partial (True when any AI stage fell back)
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    if SYMPTOM_TRIAGE_MODE == "fused" and llm_client.available:
+        try:
+            triage = await asyncio.wait_for(
+                _fused_triage_with_ai(symptoms),
+                timeout=deadline * SYMPTOM_FUSED_DEADLINE_FRACTION,
+            )
+        except asyncio.TimeoutError:
+            triage = None
+
+        if triage is not None:
+            return _build_symptom_analysis(
+                symptoms, triage["predictions"], triage["red_flags"], partial=False
+            )
+
+        logger.info("↩️ Fused triage unavailable, using separate AI calls")
+        deadline = max(0.0, deadline - (loop.time() - started))
+        if deadline < SYMPTOM_MIN_AI_SECONDS:
+            logger.warning(
+                f"⏱️ Only {deadline:.1f}s left after fused triage, using rule-based triage"
+            )
+            return _build_symptom_analysis(
+                symptoms, _predict_conditions_fallback(symptoms), [], partial=True
+            )
+
+    conditions_task = asyncio.create_task(_predict_conditions_with_ai(symptoms))
+    red_flags_task = asyncio.create_task(_ai_red_flags(symptoms))
+
+    done, pending = await asyncio.wait(
+        {conditions_task, red_flags_task}, timeout=deadline
+    )
+    for task in pending:
+        task.cancel()
+
+    partial = bool(pending)
+    if pending:
+        logger.warning(
+            f"⏱️ Symptom analysis deadline ({deadline:.1f}s) hit, using partial results"
+        )
+
+    predictions = None
+    if conditions_task in done and not conditions_task.exception():
+        predictions = conditions_task.result()
+    if not predictions:
+        partial = partial or llm_client.available
+        predictions = _predict_conditions_fallback(symptoms)
+
+    ai_flags = []
+    if red_flags_task in done and not red_flags_task.exception():
+        ai_flags = red_flags_task.result()
+
+    return _build_symptom_analysis(symptoms, predictions, ai_flags, partial)
+
+
 @router.get("/analyze/symptoms/sample")
 async def get_sample_symptom_check():
     """Get a sample symptom check for demo purposes"""
@@ -708,3 +969,9 @@ async def get_sample_symptom_check():
         symptoms=["fever", "cough", "fatigue", "body aches"], age=35, gender="male"
     )
     return await check_symptoms(sample_request)
+
+
+@router.get("/analyze/symptoms/cache")
+async def get_symptom_cache_stats():
+    """Hit/miss statistics for the symptom checker response cache"""
+    return symptom_cache.stats()
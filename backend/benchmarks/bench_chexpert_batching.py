@@ -0,0 +1,111 @@
+"""
+Benchmark: local chest X-ray classifier latency and throughput on CPU
+
+Runs a DenseNet121 with the 14-label CheXpert head (random weights, so no
+checkpoint is needed) under the settings MedicalImagingAnalyzer uses. It
+reports per-image latency for batch sizes 1-16 in contiguous vs
+channels-last memory format, and with the Linear head dynamically
+quantized. It then measures requests per second for N concurrent requests,
+handled one at a time and through the MicroBatcher.
+
+Run from the backend directory:
+    python benchmarks/bench_chexpert_batching.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import torch
+from torchvision.models import densenet121
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.micro_batcher import MicroBatcher  # noqa: E402
+
+NUM_LABELS = 14
+BATCH_SIZES = [1, 4, 8, 16]
+CONCURRENT_REQUESTS = 32
+RUNS = 3
+
+
+def build_model(channels_last: bool, quantize: bool):
+    model = densenet121(weights=None)
+    model.classifier = torch.nn.Linear(model.classifier.in_features, NUM_LABELS)
+    model.eval()
+    if channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+def predict(model, tensors, channels_last: bool):
+    with torch.inference_mode():
+        batch = torch.stack(tensors)
+        if channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        return torch.sigmoid(model(batch)).tolist()
+
+
+def per_image_ms(model, batch_size: int, channels_last: bool) -> float:
+    tensors = [torch.randn(3, 224, 224) for _ in range(batch_size)]
+    predict(model, tensors, channels_last)  # Warm-up
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        predict(model, tensors, channels_last)
+        timings.append(time.perf_counter() - started)
+    return min(timings) / batch_size * 1000
+
+
+async def concurrent_throughput(model, max_batch_size: int) -> float:
+    batcher = MicroBatcher(
+        lambda tensors: predict(model, tensors, channels_last=True),
+        max_batch_size=max_batch_size,
+        max_wait_ms=15,
+    )
+    tensors = [torch.randn(3, 224, 224) for _ in range(CONCURRENT_REQUESTS)]
+    started = time.perf_counter()
+    await asyncio.gather(*(batcher.submit(tensor) for tensor in tensors))
+    elapsed = time.perf_counter() - started
+    await batcher.close()
+    return CONCURRENT_REQUESTS / elapsed
+
+
+def main():
+    print("=" * 72)
+    print(f"🧪 CheXpert DenseNet121 on CPU ({torch.get_num_threads()} threads)")
+    print("=" * 72)
+
+    variants = {
+        "contiguous": (False, False),
+        "channels_last": (True, False),
+        "cl + int8 head": (True, True),
+    }
+    header = "".join(f"{f'b={size} ms/img':>14}" for size in BATCH_SIZES)
+    print(f"   {'variant':<16}{header}")
+    for name, (channels_last, quantize) in variants.items():
+        model = build_model(channels_last, quantize)
+        row = [per_image_ms(model, size, channels_last) for size in BATCH_SIZES]
+        print(f"   {name:<16}" + "".join(f"{ms:>14.1f}" for ms in row))
+
+    model = build_model(channels_last=True, quantize=False)
+    print(f"\n   {CONCURRENT_REQUESTS} concurrent requests:")
+    for max_batch_size in (1, 8):
+        rate = asyncio.run(concurrent_throughput(model, max_batch_size))
+        label = (
+            "one at a time"
+            if max_batch_size == 1
+            else f"micro-batched (<= {max_batch_size})"
+        )
+        print(f"   {label:<28} {rate:>6.1f} images/s")
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: vision model payload preparation for imaging requests
+
+Compares the legacy path (cv2.imdecode, BGR->RGB, PIL wrap, full-size JPEG
+re-encode) with MedicalImagingAnalyzer._prepare_vision_payload (JPEG
+passthrough, or one draft/thumbnail downscale and encode). Reports latency
+and payload size for synthetic uploads.
+
+Run from the backend directory:
+    python benchmarks/bench_imaging_payload.py
+"""
+
+import io
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.medical_imaging import medical_imaging_analyzer  # noqa: E402
+
+RUNS = 3
+
+
+def encode(array: np.ndarray, fmt: str, **params) -> bytes:
+    buffered = io.BytesIO()
+    Image.fromarray(array).save(buffered, format=fmt, **params)
+    return buffered.getvalue()
+
+
+def synthetic_uploads():
+    """X-ray-like smooth images in the formats clients actually send"""
+    rng = np.random.default_rng(0)
+
+    def smooth(shape, sigma):
+        noise = rng.integers(0, 255, shape, dtype=np.uint8)
+        return cv2.GaussianBlur(noise, (0, 0), sigma)
+
+    phone_photo = smooth((3000, 4000, 3), 3)
+    chest_film = smooth((3000, 2500), 8)
+    return [
+        ("small JPEG", encode(smooth((800, 1000, 3), 3), "JPEG", quality=90)),
+        ("12 MP phone JPEG", encode(phone_photo, "JPEG", quality=92)),
+        ("12 MP PNG", encode(phone_photo, "PNG")),
+        ("chest film PNG", encode(chest_film, "PNG")),
+        ("16-bit chest film PNG", encode(chest_film.astype(np.uint16) * 256, "PNG")),
+    ]
+
+
+def legacy_payload(image_content: bytes) -> bytes:
+    nparr = np.frombuffer(image_content, np.uint8)
+    img_cv = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    img_pil = Image.fromarray(cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB))
+    buffered = io.BytesIO()
+    img_pil.save(buffered, format="JPEG", quality=85)
+    return buffered.getvalue()
+
+
+def measure(fn, image_content):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        payload = fn(image_content)
+        timings.append(time.perf_counter() - started)
+    return min(timings), payload
+
+
+def main():
+    print("=" * 80)
+    print("🧪 Imaging payload: cv2 decode + re-encode vs passthrough / single resize")
+    print("=" * 80)
+    print(f"   {'upload':<24} {'bytes':>9} {'method':<8} {'ms':>6} {'payload':>9}")
+
+    for name, content in synthetic_uploads():
+        for method, fn in (
+            ("legacy", legacy_payload),
+            ("new", medical_imaging_analyzer._prepare_vision_payload),
+        ):
+            elapsed, payload = measure(fn, content)
+            print(
+                f"   {name:<24} {len(content):>9} {method:<8} "
+                f"{elapsed * 1000:>6.0f} {len(payload):>9}"
+            )
+
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: lab value extraction on multi-page reports
+
+Compares the legacy extractor (two overlapping regexes, a linear name scan
+and a normal-range dict rebuilt per match) with the single-pass trie-regex
+extractor in services.lab_extractor. Reports throughput and how many
+entries each one returns (the legacy one returns duplicates).
+
+Run from the backend directory:
+    python benchmarks/bench_lab_extractor.py
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.lab_extractor import lab_extractor  # noqa: E402
+
+PAGE_COUNTS = [1, 5, 20, 50]
+RUNS = 5
+
+LAB_LINES = [
+    "Fasting Glucose: 142 mg/dL (70 - 100)",
+    "Hemoglobin 11.2 g/dL (13.5 - 17.5)",
+    "WBC Count 12.5 K/uL",
+    "Platelet Count 250 K/uL",
+    "Total Cholesterol 230 mg/dL",
+    "HDL Cholesterol 38 mg/dL",
+    "LDL Cholesterol 160 mg/dL",
+    "Triglycerides 210 mg/dL",
+    "Serum Creatinine 1.4 mg/dL",
+    "Sodium 139 mmol/L",
+    "Potassium 5.8 mmol/L",
+    "ALT (SGPT) 65 U/L",
+]
+NARRATIVE = (
+    "The patient is a 54 year old male with a 10 year history of type 2 diabetes. "
+    "He reports 2 episodes of dizziness over the past 3 weeks and takes 500 mg "
+    "metformin twice daily. Blood pressure was 150 over 95 at the 2 visits.\n"
+)
+
+
+def legacy_extract(text):
+    """The original ReportAnalyzer._extract_lab_values logic"""
+    common_tests = [
+        "glucose", "hemoglobin", "wbc", "rbc", "platelet", "cholesterol", "hdl",
+        "ldl", "triglycerides", "creatinine", "bun", "alt", "ast", "bilirubin",
+        "sodium", "potassium", "calcium",
+    ]
+
+    def get_normal_range(test_name):
+        normal_ranges = {
+            "glucose": {"min": 70, "max": 100, "unit": "mg/dL"},
+            "hemoglobin": {"min": 13, "max": 17, "unit": "g/dL"},
+            "wbc": {"min": 4, "max": 11, "unit": "K/uL"},
+            "cholesterol": {"min": 0, "max": 200, "unit": "mg/dL"},
+            "creatinine": {"min": 0.6, "max": 1.2, "unit": "mg/dL"},
+        }
+        for key, range_val in normal_ranges.items():
+            if key in test_name.lower():
+                return range_val
+        return {"min": 0, "max": 0, "unit": ""}
+
+    lab_values = []
+    patterns = [
+        r"(\w+(?:\s+\w+)?)\s*:\s*([0-9.]+)\s*(\w+/?\w*)",
+        r"(\w+(?:\s+\w+)?)\s+([0-9.]+)\s+(\w+/?\w*)",
+    ]
+    for pattern in patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            test_name = match.group(1).strip()
+            if any(test in test_name.lower() for test in common_tests):
+                lab_values.append(
+                    {
+                        "test": test_name,
+                        "value": float(match.group(2)),
+                        "unit": match.group(3).strip(),
+                        "normal_range": get_normal_range(test_name),
+                    }
+                )
+    return lab_values
+
+
+def build_report(pages: int) -> str:
+    parts = []
+    for page in range(1, pages + 1):
+        parts.append(f"\n--- Page {page} ---\n")
+        parts.append(NARRATIVE * 6)
+        parts.append("\n".join(LAB_LINES))
+        parts.append("\n" + NARRATIVE * 4)
+    return "".join(parts)
+
+
+def time_it(fn, text):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = fn(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    print("=" * 72)
+    print("🧪 Lab value extraction: legacy vs single-pass trie regex")
+    print("=" * 72)
+    print(f"   {'pages':>5} {'chars':>8} {'legacy ms':>10} {'new ms':>8} "
+          f"{'speedup':>8} {'legacy n':>9} {'new n':>6}")
+
+    for pages in PAGE_COUNTS:
+        text = build_report(pages)
+        legacy_time, legacy = time_it(legacy_extract, text)
+        new_time, new = time_it(lab_extractor.extract, text)
+        print(
+            f"   {pages:>5} {len(text):>8} {legacy_time * 1000:>10.2f} "
+            f"{new_time * 1000:>8.2f} {legacy_time / new_time:>7.1f}x "
+            f"{len(legacy):>9} {len(new):>6}"
+        )
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
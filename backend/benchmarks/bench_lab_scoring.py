@@ -0,0 +1,173 @@
+"""
+Benchmark: abnormality scoring for many lab panels
+
+Compares the legacy per-report loop (one Python dict walk and string build
+per lab value, count-based severity) with the columnar scorer in
+services.lab_scoring: score_panels on the same dicts (checked to produce
+identical abnormalities and severity) and score_arrays on columns already
+held in NumPy arrays.
+
+Run from the backend directory:
+    python benchmarks/bench_lab_scoring.py
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base.reference_ranges import reference_ranges  # noqa: E402
+from services.lab_scoring import lab_scorer  # noqa: E402
+
+PANEL_COUNTS = [100, 1000, 10000]
+LABS_PER_PANEL = 12
+RUNS = 3
+
+
+def legacy_identify_abnormalities(lab_values):
+    """The per-report ReportAnalyzer._identify_abnormalities loop"""
+    abnormalities = []
+    for lab in lab_values:
+        normal_range = lab["normal_range"]
+        min_val = normal_range.get("min") if normal_range else None
+        max_val = normal_range.get("max") if normal_range else None
+        if (min_val is None and max_val is None) or max_val == 0:
+            continue
+
+        value = lab["value"]
+        range_text = (
+            f"{min_val}-{max_val}"
+            if min_val is not None and max_val is not None
+            else (f">{min_val}" if min_val is not None else f"<{max_val}")
+        )
+        if min_val is not None and value < min_val:
+            deviation = ((min_val - value) / min_val) * 100
+            status, direction = "LOW", "below"
+        elif max_val is not None and value > max_val:
+            deviation = ((value - max_val) / max_val) * 100
+            status, direction = "HIGH", "above"
+        else:
+            continue
+
+        abnormalities.append(
+            {
+                "test": lab["test"],
+                "value": value,
+                "unit": lab["unit"],
+                "normal_range": range_text,
+                "status": status,
+                "deviation": f"{deviation:.1f}% {direction} normal",
+            }
+        )
+    return abnormalities
+
+
+def legacy_severity(abnormalities):
+    if not abnormalities:
+        return "NORMAL"
+    elif len(abnormalities) <= 2:
+        return "MILD"
+    elif len(abnormalities) <= 4:
+        return "MODERATE"
+    return "SIGNIFICANT"
+
+
+def legacy_score(panels):
+    results = []
+    for panel in panels:
+        abnormalities = legacy_identify_abnormalities(panel)
+        results.append(
+            {"abnormalities": abnormalities, "severity": legacy_severity(abnormalities)}
+        )
+    return results
+
+
+def build_panels(count, rng):
+    tests = list(reference_ranges.tests)
+    panels = []
+    for _ in range(count):
+        panel = []
+        for canonical in rng.sample(tests, LABS_PER_PANEL):
+            normal_range = reference_ranges.lookup(canonical) or {
+                "min": 0, "max": 0, "unit": ""
+            }
+            anchor = normal_range["max"] or normal_range["min"] or 1
+            # Mostly in range, with roughly one value in six out of range
+            spread = rng.choice((0.6, 0.8, 0.9, 0.95, 0.95, 1.4))
+            panel.append(
+                {
+                    "test": reference_ranges.tests[canonical]["display_name"],
+                    "canonical": canonical,
+                    "value": round(anchor * spread, 2),
+                    "unit": normal_range["unit"],
+                    "normal_range": normal_range,
+                }
+            )
+        panels.append(panel)
+    return panels
+
+
+def to_columns(panels):
+    """Columnar form of the panels, as a bulk job would load it from storage"""
+    labs = [lab for panel in panels for lab in panel]
+
+    def bound(lab, key):
+        value = lab["normal_range"].get(key)
+        return np.nan if value is None else value
+
+    return (
+        np.array([lab["value"] for lab in labs]),
+        np.array([bound(lab, "min") for lab in labs]),
+        np.array([bound(lab, "max") for lab in labs]),
+        np.array([lab_scorer.weights.get(lab["canonical"], 1.0) for lab in labs]),
+        np.repeat(np.arange(len(panels)), [len(panel) for panel in panels]),
+        len(panels),
+    )
+
+
+def time_it(fn, *args):
+    timings = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    rng = random.Random(0)
+
+    print("=" * 72)
+    print("🧪 Lab panel scoring: per-report loop vs columnar batch")
+    print("=" * 72)
+    print(
+        f"   {'panels':>7} {'legacy ms':>10} {'dicts ms':>9} {'arrays ms':>10} "
+        f"{'speedup':>8} {'match':>6}"
+    )
+
+    for count in PANEL_COUNTS:
+        panels = build_panels(count, rng)
+        legacy_time, legacy = time_it(legacy_score, panels)
+        batch_time, batch = time_it(lab_scorer.score_panels, panels)
+        arrays_time, _ = time_it(lab_scorer.score_arrays, *to_columns(panels))
+
+        match = all(
+            old["abnormalities"] == new["abnormalities"]
+            and old["severity"] == new["severity"]
+            for old, new in zip(legacy, batch)
+        )
+        print(
+            f"   {count:>7} {legacy_time * 1000:>10.1f} {batch_time * 1000:>9.1f} "
+            f"{arrays_time * 1000:>10.2f} {legacy_time / arrays_time:>7.0f}x "
+            f"{'✅' if match else '❌':>5}"
+        )
+
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
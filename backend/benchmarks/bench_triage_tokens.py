@@ -0,0 +1,111 @@
+"""
+Benchmark: tokens per symptom triage request, fused vs split mode
+
+Split mode sends the condition prompt and the red flag prompt separately;
+fused mode sends one combined prompt. Without GROQ_API_KEY the prompt token
+counts are estimated (~4 characters per token). With a key, each prompt is
+sent to Groq and the reported usage (prompt + completion tokens) is used.
+
+Run from the backend directory:
+    python benchmarks/bench_triage_tokens.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.symptom_checker import (  # noqa: E402
+    _build_conditions_prompt,
+    _build_red_flags_prompt,
+    _build_triage_prompt,
+    _normalize_symptoms,
+)
+from config import GROQ_API_KEY, GROQ_MODEL  # noqa: E402
+
+SYMPTOM_SETS = [
+    ["fever", "cough", "fatigue"],
+    ["chest pain", "shortness of breath"],
+    ["headache", "fever", "stiff neck", "confusion"],
+    ["nausea", "vomiting", "diarrhea"],
+    ["snake bite", "swelling", "dizziness"],
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def build_prompts(symptoms):
+    normalized = _normalize_symptoms(symptoms)
+    split = [
+        (_build_conditions_prompt(" ".join(normalized)), 1000),
+        (_build_red_flags_prompt(normalized), 300),
+    ]
+    fused = [(_build_triage_prompt(" ".join(normalized)), 1200)]
+    return split, fused
+
+
+def measure_live(client, prompts):
+    """Send prompts to Groq and return (total tokens, seconds)"""
+    total = 0
+    started = time.perf_counter()
+    for prompt, max_tokens in prompts:
+        response = client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=max_tokens,
+        )
+        total += response.usage.total_tokens
+    return total, time.perf_counter() - started
+
+
+def main():
+    print("=" * 60)
+    print("🧪 Symptom triage tokens per request: split vs fused")
+    print("=" * 60)
+
+    client = None
+    if GROQ_API_KEY:
+        from groq import Groq
+
+        client = Groq(api_key=GROQ_API_KEY)
+        print(f"📡 Live mode ({GROQ_MODEL}): prompt + completion tokens\n")
+    else:
+        print("📐 Estimate mode (no GROQ_API_KEY): prompt tokens only\n")
+
+    split_total = 0
+    fused_total = 0
+    for symptoms in SYMPTOM_SETS:
+        split, fused = build_prompts(symptoms)
+
+        if client:
+            split_tokens, split_time = measure_live(client, split)
+            fused_tokens, fused_time = measure_live(client, fused)
+            timing = f" | {split_time:.2f}s -> {fused_time:.2f}s"
+        else:
+            split_tokens = sum(estimate_tokens(p) for p, _ in split)
+            fused_tokens = sum(estimate_tokens(p) for p, _ in fused)
+            timing = ""
+
+        split_total += split_tokens
+        fused_total += fused_tokens
+        print(
+            f"   {', '.join(symptoms)[:40]:<40} "
+            f"split={split_tokens:>5} fused={fused_tokens:>5}{timing}"
+        )
+
+    n = len(SYMPTOM_SETS)
+    saved = split_total - fused_total
+    print("\n" + "-" * 60)
+    print(f"   Avg tokens/request (split): {split_total / n:.0f}")
+    print(f"   Avg tokens/request (fused): {fused_total / n:.0f}")
+    print(f"   Saved per request: {saved / n:.0f} ({saved / split_total:.0%})")
+    print(f"   Round trips per request: 2 -> 1")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,11 @@ BIOBERT_MODEL = "dmis-lab/biobert-v1.1"
 CLINICALBERT_MODEL = "emilyalsentzer/Bio_ClinicalBERT"
 MEDICAL_NER_MODEL = "samrawal/bert-base-uncased_clinical-ner"
 
+# NER Inference Settings (long texts are split into overlapping token windows)
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", 16))
+NER_WINDOW_TOKENS = 500  # Leaves room for [CLS]/[SEP] under BERT's 512 limit
+NER_WINDOW_OVERLAP = 64
+
 # Knowledge Base Settings
 KNOWLEDGE_BASE_DIR = BASE_DIR / "knowledge_base"
 KNOWLEDGE_BASE_DIR.mkdir(exist_ok=True)
@@ -41,6 +46,81 @@ RXNORM_API_URL = "https://rxnav.nlm.nih.gov/REST"
 OPENFDA_API_URL = "https://api.fda.gov"
 OPENFDA_API_KEY = os.getenv("OPENFDA_API_KEY", "")
 
+# Groq LLM Settings
+GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+GROQ_VISION_MODEL = os.getenv("GROQ_VISION_MODEL", "llama-3.2-11b-vision-preview")
+
+# Vision model image payload: JPEG uploads within both limits are sent as-is,
+# anything else is downscaled once to IMAGING_TARGET_SIDE and encoded as JPEG
+IMAGING_TARGET_SIDE = int(os.getenv("IMAGING_TARGET_SIDE", 1120))  # Longest side (px)
+IMAGING_PASSTHROUGH_MAX_BYTES = int(
+    os.getenv("IMAGING_PASSTHROUGH_MAX_BYTES", 3 * 1024 * 1024)
+)  # Base64 adds a third; the API caps encoded images at 4MB
+IMAGING_JPEG_QUALITY = int(os.getenv("IMAGING_JPEG_QUALITY", 85))
+
+# LLM Connection Pool (shared keep-alive connections to the Groq API)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 1))
+
+# Per-endpoint LLM concurrency limits and timeouts (seconds)
+LLM_ENDPOINT_LIMITS = {
+    "chat": {"concurrency": 8, "timeout": 30.0},
+    "symptoms": {"concurrency": 8, "timeout": 20.0},
+    "report": {"concurrency": 4, "timeout": 45.0},
+    "imaging": {"concurrency": 2, "timeout": 60.0},
+}
+
+# Shared deadline (seconds) for the concurrent symptom analysis stages
+SYMPTOM_ANALYSIS_DEADLINE = float(os.getenv("SYMPTOM_ANALYSIS_DEADLINE", 15))
+
+# Report analysis: the Groq analysis must finish within REPORT_ANALYSIS_DEADLINE
+# seconds, otherwise the local NER analysis is returned. "race" starts the local
+# analysis once REPORT_FALLBACK_HEDGE_FRACTION of the deadline has passed without
+# an AI result, "cascade" only once the Groq call has failed or missed the deadline.
+# Whichever valid result finishes first is returned. At most
+# REPORT_FALLBACK_MAX_CONCURRENCY local analyses run at a time, and one that takes
+# longer than REPORT_FALLBACK_TIMEOUT seconds is replaced by lab values only
+REPORT_ANALYSIS_DEADLINE = float(os.getenv("REPORT_ANALYSIS_DEADLINE", 20))
+REPORT_ANALYSIS_STRATEGY = os.getenv("REPORT_ANALYSIS_STRATEGY", "race")  # race | cascade
+REPORT_FALLBACK_HEDGE_FRACTION = float(os.getenv("REPORT_FALLBACK_HEDGE_FRACTION", 0.6))
+REPORT_FALLBACK_MAX_CONCURRENCY = int(os.getenv("REPORT_FALLBACK_MAX_CONCURRENCY", 2))
+REPORT_FALLBACK_TIMEOUT = float(os.getenv("REPORT_FALLBACK_TIMEOUT", 10))
+
+# Long reports: text over REPORT_CHUNK_MAX_CHARS is split on its page markers into
+# chunks of at most that size (up to REPORT_MAX_CHUNKS), analysed at most
+# REPORT_CHUNK_CONCURRENCY at a time (below the "report" endpoint limit, so one
+# report cannot take every slot) and merged. Chunked reports get their own
+# REPORT_CHUNKED_ANALYSIS_DEADLINE; chunks still running then are dropped and
+# the result is marked partial. "off" analyses only the first REPORT_CHUNK_MAX_CHARS
+REPORT_CHUNKED_ANALYSIS = os.getenv("REPORT_CHUNKED_ANALYSIS", "auto")  # auto | off
+REPORT_CHUNK_MAX_CHARS = int(os.getenv("REPORT_CHUNK_MAX_CHARS", 3000))
+REPORT_MAX_CHUNKS = int(os.getenv("REPORT_MAX_CHUNKS", 12))
+REPORT_CHUNK_CONCURRENCY = int(os.getenv("REPORT_CHUNK_CONCURRENCY", 2))
+REPORT_CHUNKED_ANALYSIS_DEADLINE = float(
+    os.getenv("REPORT_CHUNKED_ANALYSIS_DEADLINE", 45)
+)
+
+# Symptom triage mode: "fused" asks for conditions and red flags in one LLM call,
+# "split" makes separate condition and red flag calls. The fused call gets
+# SYMPTOM_FUSED_DEADLINE_FRACTION of SYMPTOM_ANALYSIS_DEADLINE so the split calls
+# keep a budget if it fails; they are skipped (rule-based result) when less than
+# SYMPTOM_MIN_AI_SECONDS remains
+SYMPTOM_TRIAGE_MODE = os.getenv("SYMPTOM_TRIAGE_MODE", "fused")
+SYMPTOM_FUSED_DEADLINE_FRACTION = float(
+    os.getenv("SYMPTOM_FUSED_DEADLINE_FRACTION", 0.6)
+)
+SYMPTOM_MIN_AI_SECONDS = float(os.getenv("SYMPTOM_MIN_AI_SECONDS", 1.0))
+
+# Chat Session Store (server-side conversation history keyed by session_id)
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory")  # memory | sqlite
+SESSION_DB_PATH = Path(os.getenv("SESSION_DB_PATH", BASE_DIR / "sessions.db"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", 2 * 60 * 60))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", 1000))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", 100))
+
 # Database Settings (PostgreSQL)
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/medintel")
 
@@ -69,11 +149,47 @@ MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_EXTENSIONS = {".pdf", ".txt", ".jpg", ".jpeg", ".png"}
 UPLOAD_DIR = BASE_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Uploads are streamed in 1MB chunks
+UPLOAD_SPOOL_MAX_MEMORY = 1024 * 1024  # Larger uploads spill to a temp file
+
+# Batch extraction (/ocr/extract/batch): files per request and ZIP archive size
+OCR_BATCH_MAX_FILES = int(os.getenv("OCR_BATCH_MAX_FILES", 50))
+OCR_BATCH_MAX_BYTES = int(os.getenv("OCR_BATCH_MAX_BYTES", 100 * 1024 * 1024))
+
+# Extraction cache (extracted text + page metadata keyed by upload SHA-256)
+EXTRACTION_CACHE_DIR = UPLOAD_DIR / "extraction_cache"
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 256))
+EXTRACTION_CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60))
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 200 * 1024 * 1024))
 
 # OCR Settings
 OCR_ENABLED = os.getenv("OCR_ENABLED", "True").lower() == "true"
 TESSERACT_PATH = os.getenv("TESSERACT_PATH", None)
 
+# OCR preprocessing: images are downscaled to about OCR_TARGET_DPI (A4) and only
+# denoised above OCR_NOISE_THRESHOLD (estimated noise sigma).
+# "fast" uses a median filter, "quality" uses bilateral / non-local means
+OCR_PREPROCESS_MODE = os.getenv("OCR_PREPROCESS_MODE", "fast")  # fast | quality
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 200))
+OCR_NOISE_THRESHOLD = float(os.getenv("OCR_NOISE_THRESHOLD", 6.0))
+
+# EasyOCR weights are stored once and reused by every extraction worker
+EASYOCR_MODEL_DIR = MODELS_DIR / "easyocr"
+EASYOCR_MODEL_DIR.mkdir(exist_ok=True)
+EASYOCR_WARMUP_TIMEOUT_SECONDS = float(os.getenv("EASYOCR_WARMUP_TIMEOUT_SECONDS", 600))
+
+# Document Extraction Worker Pool (OCR / PDF parsing run off the event loop)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", EXTRACTION_WORKERS * 4))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", 120))
+EXTRACTION_OCR_PAGES_PER_JOB = int(os.getenv("EXTRACTION_OCR_PAGES_PER_JOB", 2))
+
+# PDF page classification: pages with fewer text-layer characters are OCR'd as
+# image-only; text pages whose embedded images cover more of the page are "mixed"
+# and OCR'd in addition to their text layer
+PDF_MIN_TEXT_CHARS = int(os.getenv("PDF_MIN_TEXT_CHARS", 20))
+PDF_MIXED_IMAGE_COVERAGE = float(os.getenv("PDF_MIXED_IMAGE_COVERAGE", 0.3))
+
 # Logging Settings
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -82,6 +198,44 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 MODEL_CACHE_DIR = MODELS_DIR / "cache"
 MODEL_CACHE_DIR.mkdir(exist_ok=True)
 
+# Response Cache Settings
+CACHE_DIR = BASE_DIR / "cache"
+CACHE_DIR.mkdir(exist_ok=True)
+
+# Symptom checker LLM response cache (keyed by normalized symptom set)
+SYMPTOM_CACHE_MAX_ENTRIES = int(os.getenv("SYMPTOM_CACHE_MAX_ENTRIES", 1024))
+SYMPTOM_CACHE_TTL_SECONDS = int(os.getenv("SYMPTOM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+SYMPTOM_CACHE_DISK_ENABLED = (
+    os.getenv("SYMPTOM_CACHE_DISK_ENABLED", "False").lower() == "true"
+)
+SYMPTOM_CACHE_DISK_MAX_BYTES = int(
+    os.getenv("SYMPTOM_CACHE_DISK_MAX_BYTES", 50 * 1024 * 1024)
+)
+
+# Model Registry Settings (models load on first use; least recently used ones
+# are unloaded when resident models exceed the budget, 0 = no limit)
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", 2048))
+
+# Embedding Service Settings ([CLS] vectors cached by content hash)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 32))
+EMBEDDING_NUM_THREADS = int(os.getenv("EMBEDDING_NUM_THREADS", 0))  # 0 = torch default
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 4096))
+EMBEDDING_STORE_DIR = MODEL_CACHE_DIR / "embeddings"
+EMBEDDING_STORE_MAX_VECTORS = int(os.getenv("EMBEDDING_STORE_MAX_VECTORS", 100000))
+
+# Chest X-ray Classifier (DenseNet121 with the 14 CheXpert labels). The checkpoint
+# at CHEXPERT_WEIGHTS_PATH must be {"labels": [...CheXpert labels...], "state_dict"}.
+# Without it, or once the classifier fails, X-rays go to the vision model instead.
+# Concurrent requests are grouped into batches of up to IMAGING_BATCH_MAX_SIZE,
+# waiting at most IMAGING_BATCH_MAX_WAIT_MS for a batch to fill
+CHEXPERT_WEIGHTS_PATH = Path(
+    os.getenv("CHEXPERT_WEIGHTS_PATH", MODELS_DIR / "chexpert_densenet121.pt")
+)
+CHEXPERT_THRESHOLD = float(os.getenv("CHEXPERT_THRESHOLD", 0.5))
+CHEXPERT_QUANTIZE = os.getenv("CHEXPERT_QUANTIZE", "False").lower() == "true"
+IMAGING_BATCH_MAX_SIZE = int(os.getenv("IMAGING_BATCH_MAX_SIZE", 8))
+IMAGING_BATCH_MAX_WAIT_MS = float(os.getenv("IMAGING_BATCH_MAX_WAIT_MS", 15))
+
 # Confidence Thresholds
 DISEASE_PREDICTION_THRESHOLD = 0.5
 ENTITY_EXTRACTION_THRESHOLD = 0.6
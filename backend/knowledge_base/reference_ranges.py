@@ -0,0 +1,221 @@
+"""
+Lab Reference Range Store
+Loads knowledge_base/reference_ranges.json once into an index keyed by
+(canonical test, sex, age band), so each lookup is a single dict access
+"""
+
+import bisect
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_RANGES_PATH = Path(__file__).resolve().parent / "reference_ranges.json"
+
+SEXES = ("male", "female", "any")
+
+_SEX_ALIASES = {"m": "male", "man": "male", "f": "female", "woman": "female"}
+
+# Unknown age maps to this band; only ranges without age bounds apply to it
+UNKNOWN_AGE_BAND = -1
+
+# A unitless value is plausible in a unit when, converted, it lies within this
+# factor of the reference range (e.g. glucose 5.4 is mmol/L, not mg/dL)
+PLAUSIBLE_RANGE_FACTOR = 3.0
+
+
+def normalize_unit(unit: str) -> str:
+    """Canonical spelling of a unit for comparison (case, micro sign, spacing)"""
+    return (
+        (unit or "")
+        .strip()
+        .replace("µ", "u")
+        .replace("μ", "u")
+        .replace("×", "x")
+        .replace(" ", "")
+        .lower()
+    )
+
+
+def normalize_sex(sex: Optional[str]) -> str:
+    value = (sex or "").strip().lower()
+    value = _SEX_ALIASES.get(value, value)
+    return value if value in ("male", "female") else "any"
+
+
+class ReferenceRangeStore:
+    """Indexed reference ranges, synonyms and unit conversions per lab test"""
+
+    def __init__(self, path: Path = REFERENCE_RANGES_PATH):
+        self.path = Path(path)
+        self.tests: Dict[str, Dict[str, Any]] = {}
+        self._age_breakpoints: List[float] = []
+        self._index: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+        self._factors: Dict[Tuple[str, str], float] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.tests = json.load(f)["tests"]
+        except Exception as e:
+            logger.error(f"❌ Could not load reference ranges from {self.path}: {e}")
+            self.tests = {}
+
+        breakpoints = set()
+        for test in self.tests.values():
+            for entry in test["ranges"]:
+                breakpoints.update(
+                    entry[key] for key in ("age_min", "age_max") if entry.get(key) is not None
+                )
+        self._age_breakpoints = sorted(breakpoints)
+
+        # Resolve the most specific range for every (test, sex, age band) up front
+        self._index = {}
+        self._factors = {}
+        bands = [UNKNOWN_AGE_BAND, *range(len(self._age_breakpoints) + 1)]
+        for canonical, test in self.tests.items():
+            unit = test["unit"]
+            self._factors[(canonical, normalize_unit(unit))] = 1.0
+            for reported_unit, factor in test.get("conversions", {}).items():
+                self._factors[(canonical, normalize_unit(reported_unit))] = factor
+
+            for sex in SEXES:
+                for band in bands:
+                    entry = self._resolve(test["ranges"], sex, band)
+                    if entry is not None:
+                        self._index[(canonical, sex, band)] = {
+                            "min": entry.get("min"),
+                            "max": entry.get("max"),
+                            "unit": unit,
+                        }
+
+        logger.info(f"✅ Loaded reference ranges for {len(self.tests)} lab tests")
+
+    def _resolve(self, ranges: List[Dict], sex: str, band: int) -> Optional[Dict]:
+        """Most specific range entry for a sex and age band (sex beats age)"""
+        best, best_score = None, -1
+        for entry in ranges:
+            entry_sex = entry.get("sex", "any")
+            if entry_sex != "any" and entry_sex != sex:
+                continue
+
+            has_age = entry.get("age_min") is not None or entry.get("age_max") is not None
+            if has_age:
+                if band == UNKNOWN_AGE_BAND:
+                    continue
+                band_age = self._band_representative_age(band)
+                if entry.get("age_min") is not None and band_age < entry["age_min"]:
+                    continue
+                if entry.get("age_max") is not None and band_age >= entry["age_max"]:
+                    continue
+
+            score = (2 if entry_sex != "any" else 0) + (1 if has_age else 0)
+            if score > best_score:
+                best, best_score = entry, score
+        return best
+
+    def _band_representative_age(self, band: int) -> float:
+        """An age that lies inside the band (band i spans breakpoints[i-1]..breakpoints[i])"""
+        if band == 0:
+            return (self._age_breakpoints[0] - 1) if self._age_breakpoints else 0
+        return self._age_breakpoints[band - 1]
+
+    def _age_band(self, age: Optional[float]) -> int:
+        if age is None:
+            return UNKNOWN_AGE_BAND
+        return bisect.bisect_right(self._age_breakpoints, age)
+
+    def synonyms(self) -> Dict[str, List[str]]:
+        """Canonical test -> names it appears under in reports"""
+        return {canonical: test["synonyms"] for canonical, test in self.tests.items()}
+
+    def units(self) -> List[str]:
+        """Every unit a test is reported in (canonical units and convertible ones)"""
+        units = set()
+        for test in self.tests.values():
+            units.add(test["unit"])
+            units.update(test.get("conversions", {}))
+        return sorted(units)
+
+    def conversion_factor(self, canonical: str, unit: str) -> Optional[float]:
+        """Factor converting a value in unit to the test's canonical unit (None if unknown)"""
+        if not unit:
+            return None  # A missing unit is unknown, not the canonical one
+        return self._factors.get((canonical, normalize_unit(unit)))
+
+    def infer_unit(
+        self,
+        canonical: str,
+        value: float,
+        sex: Optional[str] = None,
+        age: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Unit a unitless value was most likely reported in, or None
+
+        A unit is plausible when the converted value lies within
+        PLAUSIBLE_RANGE_FACTOR of the reference range. The unit is only
+        inferred when every plausible unit has the same conversion factor;
+        if the value would fit several scales, it stays unknown.
+        """
+        test = self.tests.get(canonical)
+        entry = self._index.get((canonical, normalize_sex(sex), self._age_band(age)))
+        if test is None or entry is None:
+            return None
+
+        low = entry["min"] if entry["min"] is not None else entry["max"]
+        high = entry["max"] if entry["max"] is not None else entry["min"]
+        if low is None:
+            return None
+
+        candidates = [test["unit"], *test.get("conversions", {})]
+        plausible = {}
+        for unit in candidates:
+            factor = self._factors[(canonical, normalize_unit(unit))]
+            converted = value * factor
+            if low / PLAUSIBLE_RANGE_FACTOR <= converted:
+                if converted <= high * PLAUSIBLE_RANGE_FACTOR:
+                    plausible.setdefault(factor, unit)
+
+        if len(plausible) != 1:
+            return None
+        return next(iter(plausible.values()))
+
+    def lookup(
+        self,
+        canonical: str,
+        sex: Optional[str] = None,
+        age: Optional[float] = None,
+        unit: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Reference range for a test, patient sex/age, expressed in unit
+
+        Returns {"min", "max", "unit"} (None for an open bound), or None
+        when the test is unknown or unit cannot be converted. Without a unit
+        the range is given in the test's canonical unit.
+        """
+        entry = self._index.get((canonical, normalize_sex(sex), self._age_band(age)))
+        if entry is None:
+            return None
+        if unit is None:
+            return dict(entry)
+
+        factor = self.conversion_factor(canonical, unit)
+        if factor is None:
+            return None
+        if factor == 1.0:
+            return dict(entry, unit=unit or entry["unit"])
+
+        return {
+            "min": None if entry["min"] is None else round(entry["min"] / factor, 3),
+            "max": None if entry["max"] is None else round(entry["max"] / factor, 3),
+            "unit": unit,
+        }
+
+
+# Global instance
+reference_ranges = ReferenceRangeStore()
@@ -2,6 +2,7 @@
 MedIntel Backend - Main Application Entry Point
 """
 
+import asyncio
 import logging
 
 import uvicorn
@@ -56,6 +57,19 @@ async def health_check():
     return {"status": "healthy", "service": "MedIntel Backend", "version": "1.0.0"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check - 503 until background warm-up (OCR workers) has finished"""
+    from services.document_processor import document_processor
+
+    components = {"ocr": document_processor.ready}
+    ready = all(components.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "warming_up", "components": components},
+    )
+
+
 # Import and include routers
 try:
     from api.report_analyzer import router as report_router
@@ -118,6 +132,12 @@ async def startup_event():
     logger.info(f"📍 API Host: {API_HOST}")
     logger.info(f"🔌 API Port: {API_PORT}")
     logger.info(f"🐛 Debug Mode: {API_DEBUG}")
+
+    # Load OCR models in the extraction workers without delaying startup
+    from services.document_processor import document_processor
+
+    app.state.ocr_warm_up = asyncio.create_task(document_processor.warm_up_workers())
+
     logger.info("✅ MedIntel Backend started successfully")
 
 
@@ -125,6 +145,22 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("🛑 Shutting down MedIntel Backend...")
+
+    from services.llm_client import llm_client
+
+    await llm_client.close()
+
+    from services.extraction_pool import extraction_pool
+
+    extraction_pool.shutdown()
+
+    from services.medical_imaging import medical_imaging_analyzer
+
+    await medical_imaging_analyzer.batcher.close()
+
+    from services.report_analyzer import report_analyzer
+
+    report_analyzer.shutdown()
     logger.info("✅ MedIntel Backend shut down successfully")
 
 
@@ -0,0 +1,64 @@
+"""
+Rolling Conversation Summary
+Folds messages that leave the recent-history window into a persisted
+keyword summary, so each message is scanned exactly once
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Number of recent messages sent verbatim to the model
+RECENT_WINDOW = 20
+
+# (keywords, summary phrase) in the order phrases appear in the summary
+SUMMARY_TOPICS = [
+    (("pain", "hurt"), "discussed pain/discomfort"),
+    (("medication", "medicine"), "mentioned medications"),
+    (("doctor", "hospital"), "talked about medical visits"),
+    (("test", "report"), "discussed test results"),
+]
+
+
+class RollingSummary:
+    """Incremental keyword summary of the early part of a conversation"""
+
+    def __init__(self, topics: Optional[List[str]] = None, folded_count: int = 0):
+        self.topics = set(topics or [])
+        self.folded_count = folded_count  # Messages from the start already folded
+
+    def fold(self, messages: List[Any]):
+        """Fold new messages into the summary (each one is lower-cased once)"""
+        for msg in messages:
+            content = (
+                msg.get("content", "")
+                if isinstance(msg, dict)
+                else getattr(msg, "content", "")
+            ).lower()
+
+            for keywords, phrase in SUMMARY_TOPICS:
+                if phrase not in self.topics and any(kw in content for kw in keywords):
+                    self.topics.add(phrase)
+
+            self.folded_count += 1
+
+    def fold_window(self, history: List[Any], window: int = RECENT_WINDOW):
+        """Fold every message that has left the recent window but is not folded yet"""
+        boundary = len(history) - window
+        if boundary > self.folded_count:
+            self.fold(history[self.folded_count : boundary])
+
+    def drop(self, count: int):
+        """Account for messages removed from the start of the history"""
+        self.folded_count = max(0, self.folded_count - count)
+
+    def text(self) -> str:
+        return "; ".join(
+            phrase for _, phrase in SUMMARY_TOPICS if phrase in self.topics
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"topics": sorted(self.topics), "folded_count": self.folded_count}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "RollingSummary":
+        data = data or {}
+        return cls(data.get("topics", []), data.get("folded_count", 0))
@@ -0,0 +1,293 @@
+"""
+Embedding Service
+Batched BioBERT / ClinicalBERT [CLS] embeddings with a content-hash cache,
+so repeated symptom phrases and report sentences are encoded only once
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config import (
+    BIOBERT_MODEL,
+    CLINICALBERT_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_NUM_THREADS,
+    EMBEDDING_STORE_DIR,
+    EMBEDDING_STORE_MAX_VECTORS,
+)
+from services.cache import LRUCache, make_cache_key
+from services.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+# Encoder names accepted by the embedding service
+ENCODER_MODELS = {"biobert": BIOBERT_MODEL, "clinicalbert": CLINICALBERT_MODEL}
+
+
+def _load_encoder(model_name: str):
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    return tokenizer, model
+
+
+@contextmanager
+def _interprocess_lock(path: Path):
+    """Exclusive lock on a lock file, held across every worker process"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class VectorStore:
+    """
+    Append-only on-disk vector store backed by a memory-mapped .npy file
+
+    Rows are looked up through a key -> row index persisted next to the
+    vectors. The file grows by doubling until max_vectors rows are stored.
+    The directory is shared by every uvicorn worker: writes hold a file lock
+    and first reload the index if another process has appended to it.
+    """
+
+    def __init__(self, directory: Path, max_vectors: int = EMBEDDING_STORE_MAX_VECTORS):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / "vectors.npy"
+        self.index_path = self.directory / "index.json"
+        self.lock_path = self.directory / "store.lock"
+        self.max_vectors = max_vectors
+        self._index: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        with _interprocess_lock(self.lock_path):
+            self._load()
+
+    def _stat_index(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of the index file, or None if there is none yet"""
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """(Re)load the index and vectors (caller holds the file lock)"""
+        try:
+            if self.vectors_path.exists() and self.index_path.exists():
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    keys = json.load(f)
+                self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+                self._index = {key: row for row, key in enumerate(keys)}
+                self._index_stamp = self._stat_index()
+                logger.info(f"✅ Loaded {len(keys)} cached embeddings from {self.directory}")
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding store unreadable, starting empty: {e}")
+            self._index = {}
+            self._vectors = None
+            self._index_stamp = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._index.get(key)
+            if row is None:
+                return None
+            return np.array(self._vectors[row])
+
+    def add_many(self, items: Dict[str, np.ndarray]):
+        """Append new vectors and persist the index"""
+        with self._lock, _interprocess_lock(self.lock_path):
+            # Another worker may have appended rows since we last looked
+            if self._stat_index() != self._index_stamp:
+                self._load()
+
+            new_items = [(k, v) for k, v in items.items() if k not in self._index]
+            room = self.max_vectors - len(self._index)
+            new_items = new_items[: max(0, room)]
+            if not new_items:
+                return
+
+            dim = new_items[0][1].shape[-1]
+            self._ensure_capacity(len(self._index) + len(new_items), dim)
+
+            for key, vector in new_items:
+                row = len(self._index)
+                self._vectors[row] = vector
+                self._index[key] = row
+
+            self._vectors.flush()
+            keys = sorted(self._index, key=self._index.get)
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(keys, f)
+            tmp_path.replace(self.index_path)
+            self._index_stamp = self._stat_index()
+
+    def _ensure_capacity(self, rows: int, dim: int):
+        """Grow the vectors file (caller holds both locks)"""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= capacity:
+            return
+
+        new_capacity = min(self.max_vectors, max(rows, capacity * 2, 1024))
+        tmp_path = self.directory / "vectors.tmp.npy"
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim)
+        )
+        if self._vectors is not None:
+            grown[: len(self._index)] = self._vectors[: len(self._index)]
+        grown.flush()
+        del grown
+
+        self._vectors = None
+        os.replace(tmp_path, self.vectors_path)
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+
+class EmbeddingService:
+    """Batched, cached sentence embeddings from the registered encoders"""
+
+    def __init__(
+        self,
+        registry=model_registry,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        num_threads: int = EMBEDDING_NUM_THREADS,
+        store_dir: Path = EMBEDDING_STORE_DIR,
+    ):
+        self.registry = registry
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.store_dir = Path(store_dir)
+        self._memory = LRUCache(max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+        self._stores: Dict[str, VectorStore] = {}
+        self._stores_lock = threading.Lock()
+        self._threads_configured = False
+
+        for name, model_name in ENCODER_MODELS.items():
+            self.registry.register(name, lambda m=model_name: _load_encoder(m))
+
+    def _store(self, model_type: str) -> VectorStore:
+        with self._stores_lock:
+            if model_type not in self._stores:
+                self._stores[model_type] = VectorStore(self.store_dir / model_type)
+            return self._stores[model_type]
+
+    def _configure_threads(self):
+        if self._threads_configured:
+            return
+        if self.num_threads > 0:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+            logger.info(f"🧵 Torch intra-op threads: {self.num_threads}")
+        self._threads_configured = True
+
+    def encode(self, texts: Union[str, List[str]], model_type: str = "biobert") -> np.ndarray:
+        """
+        Return [CLS] embeddings with shape (len(texts), hidden_size)
+
+        Cached vectors are reused; only unseen texts go through the encoder,
+        in length-sorted batches so each batch pads to a similar length.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        if model_type not in ENCODER_MODELS:
+            raise ValueError(f"Unknown encoder: {model_type}")
+
+        model_name = ENCODER_MODELS[model_type]
+        store = self._store(model_type)
+        keys = [make_cache_key(model_name, text) for text in texts]
+        vectors: Dict[str, np.ndarray] = {}
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = self._memory.get(key)
+            if vector is None:
+                vector = store.get(key)
+                if vector is not None:
+                    self._memory.set(key, vector)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+
+        if missing:
+            encoded = self._encode_uncached(missing, model_type)
+            for key, vector in encoded.items():
+                self._memory.set(key, vector)
+            store.add_many(encoded)
+            vectors.update(encoded)
+
+        return np.stack([vectors[key] for key in keys])
+
+    def _encode_uncached(self, pending: Dict[str, str], model_type: str) -> Dict[str, np.ndarray]:
+        import torch
+
+        self._configure_threads()
+        tokenizer, model = self.registry.get(model_type)
+
+        # Sort by length so padding within a batch stays small
+        ordered = sorted(pending.items(), key=lambda item: len(item[1]))
+        encoded = {}
+        for start in range(0, len(ordered), self.batch_size):
+            batch = ordered[start : start + self.batch_size]
+            inputs = tokenizer(
+                [text for _, text in batch],
+                return_tensors="pt",
+                padding="longest",
+                truncation=True,
+                max_length=512,
+            )
+            inputs = {k: v.to(model.device) for k, v in inputs.items()}
+
+            with torch.inference_mode():
+                outputs = model(**inputs)
+
+            # [CLS] token embedding (sentence representation)
+            cls = outputs.last_hidden_state[:, 0, :].float().cpu().numpy()
+            for (key, _), vector in zip(batch, cls):
+                encoded[key] = vector
+
+        return encoded
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_entries": len(self._memory),
+            **{f"{name}_stored": len(store) for name, store in self._stores.items()},
+        }
+
+
+# Global instance
+embedding_service = EmbeddingService()
@@ -0,0 +1,180 @@
+"""
+Document Extraction Worker Pool
+Runs CPU-bound OCR and PDF parsing in worker processes so the event loop
+stays responsive, with a bounded number of in-flight jobs and per-job timeouts
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional
+
+from config import (
+    EXTRACTION_MAX_PENDING,
+    EXTRACTION_TIMEOUT_SECONDS,
+    EXTRACTION_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionQueueFull(RuntimeError):
+    """Raised when the pool already has the maximum number of jobs in flight"""
+
+
+class ExtractionTimeout(RuntimeError):
+    """Raised when a job does not finish within its timeout"""
+
+
+class ExtractionPool:
+    """
+    Process pool for document extraction jobs
+
+    At most max_pending jobs are accepted at once (running plus queued);
+    further submissions fail fast with ExtractionQueueFull so the API can
+    answer 429 instead of piling up work. A slot is only freed once its jobs
+    have really finished, so a timed-out job still running in a worker keeps
+    counting. When that happens the pool is recycled: new jobs go to fresh
+    workers and the old workers are killed once every job they accepted is
+    past its timeout. Workers are started lazily on the first job.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = EXTRACTION_WORKERS,
+        max_pending: int = EXTRACTION_MAX_PENDING,
+        timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+        initializer: Optional[Callable] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.initializer = initializer
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._retired_processes: List[multiprocessing.Process] = []
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" avoids forking a process that already holds torch/OpenCV threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+            )
+            logger.info(f"✅ Extraction pool started with {self.max_workers} workers")
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run fn(*args) in a worker process and await its result"""
+        results = await self.run_many(fn, [args], timeout=timeout)
+        return results[0]
+
+    async def run_many(
+        self, fn: Callable, arg_list: List[tuple], timeout: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Fan fn out over several argument tuples as one admitted request
+
+        All jobs share one pending slot and one timeout; results are returned
+        in the order of arg_list. The slot is released when the last job
+        finishes, not when the caller stops waiting.
+        """
+        if self._pending >= self.max_pending:
+            raise ExtractionQueueFull(
+                "Document extraction is busy, please retry shortly"
+            )
+
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        jobs: List[Future] = []
+        try:
+            executor = self._get_executor()
+            jobs = [executor.submit(fn, *args) for args in arg_list]
+            return await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(job) for job in jobs)), timeout
+            )
+        except asyncio.TimeoutError:
+            # Queued jobs are cancelled; jobs already running would keep their workers
+            logger.error(f"❌ Extraction job timed out after {timeout}s")
+            if any(not job.done() for job in jobs):
+                self._retire(executor, loop, grace=timeout)
+            raise ExtractionTimeout("Document extraction timed out")
+        except BrokenProcessPool:
+            logger.error("❌ Extraction worker crashed, restarting pool")
+            if self._executor is executor:
+                self._executor = None
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise RuntimeError("Document extraction worker crashed")
+        finally:
+            self._release_when_done(jobs, loop)
+
+    def _release_when_done(self, jobs: List[Future], loop: asyncio.AbstractEventLoop):
+        """Free the request's pending slot once every one of its jobs is done"""
+        remaining = len(jobs)
+
+        def job_done():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0:
+                self._pending -= 1
+
+        def on_done(_):
+            # Called from the executor's manager thread (or here, if already done)
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(job_done)
+
+        if not jobs:
+            self._pending -= 1
+        for job in jobs:
+            job.add_done_callback(on_done)
+
+    def _retire(
+        self,
+        executor: ProcessPoolExecutor,
+        loop: asyncio.AbstractEventLoop,
+        grace: float,
+    ):
+        """
+        Replace a pool whose worker is stuck on a timed-out job
+
+        New jobs go to a fresh pool. The old pool's jobs are left to finish;
+        after grace seconds every job it accepted has timed out, so its
+        workers are killed (failing any that still hang, which frees their
+        slots).
+        """
+        if self._executor is not executor:
+            return  # Already replaced by another request
+
+        logger.warning("♻️ Recycling extraction workers stuck on a timed-out job")
+        self._executor = None
+        # shutdown() drops the executor's process table, so take it first
+        processes = list((executor._processes or {}).values())
+        self._retired_processes.extend(processes)
+        executor.shutdown(wait=False)
+        loop.call_later(grace, self._kill, processes)
+
+    def _kill(self, processes: List[multiprocessing.Process]):
+        for process in processes:
+            if process.is_alive():
+                logger.warning(f"🔪 Killing stuck extraction worker {process.pid}")
+                process.terminate()
+            if process in self._retired_processes:
+                self._retired_processes.remove(process)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._kill(list(self._retired_processes))
+
+
+# Global instance
+extraction_pool = ExtractionPool()
@@ -0,0 +1,133 @@
+"""
+Lab Value Extractor
+Single-pass extraction of lab test results from report text using one
+precompiled regex whose test-name alternation is built from a trie
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from knowledge_base.reference_ranges import normalize_unit, reference_ranges
+
+# Analyte-name qualifiers between the name and the value, e.g. "Vitamin D 25-OH"
+_NAME_QUALIFIER_PATTERN = r"(?:[^\S\n]*,?[^\S\n]*\(?\d+[-\s]?(?:OH|hydroxy)\)?)?"
+
+# Value with optional thousands separators (11,500), never the start of "25-OH"
+_VALUE_PATTERN = (
+    r"(?P<value>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"(?!\d|\.\d|-[A-Za-z])"
+)
+
+# Unit-shaped token such as mg/dL, g/dL, K/uL, x10^3/uL, /uL, mmol/L or %; it is only
+# kept as the unit when it is in the known unit vocabulary
+_UNIT_PATTERN = (
+    r"(?P<unit>%|[x×]?10\^\d+/[a-zA-Zµμ]+|/[a-zA-Zµμ]+"
+    r"|[a-zA-Zµμ]+(?:/[a-zA-Zµμ0-9.]*[a-zA-Zµμ0-9])?)?"
+)
+
+# Common lab units the reference ranges do not list, kept so they are still shown
+EXTRA_LAB_UNITS = ["mg/L", "ng/dL", "ug/dL", "mcg/dL", "fL", "pg", "mm/hr", "sec"]
+
+
+def _trie_regex(words: Iterable[str]) -> str:
+    """
+    Build a prefix-factored regex alternation from a trie of words
+
+    Longer continuations are tried before a word ends, so the regex always
+    prefers the longest synonym (e.g. "hdl cholesterol" over "hdl").
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        ends_here = "" in node
+        branches = [
+            (re.escape(char).replace(r"\ ", r"\s+") if char == " " else re.escape(char))
+            + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class LabValueExtractor:
+    """Finds "<test> [:] <value> [unit]" results in one pass over the text"""
+
+    def __init__(
+        self,
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        units: Optional[Iterable[str]] = None,
+    ):
+        synonyms = synonyms or reference_ranges.synonyms()
+        units = units or reference_ranges.units() + EXTRA_LAB_UNITS
+        self.known_units = {normalize_unit(unit) for unit in units}
+        self.canonical_by_synonym = {
+            " ".join(name.lower().split()): canonical
+            for canonical, names in synonyms.items()
+            for name in names
+        }
+        names_regex = _trie_regex(self.canonical_by_synonym)
+        self.name_pattern = re.compile(rf"\b(?:{names_regex})\b", re.IGNORECASE)
+        self.pattern = re.compile(
+            rf"\b(?P<name>{names_regex})\b"
+            r"(?:[^\S\n]+(?:count|level|levels|value))?"  # e.g. "WBC Count"
+            rf"{_NAME_QUALIFIER_PATTERN}"
+            r"[^\S\n]*(?:\([^)\n]{0,20}\))?"  # Optional qualifier, e.g. "(fasting)"
+            r"[^\S\n]*[:=\-]?[^\S\n]*"
+            rf"{_VALUE_PATTERN}[^\S\n]*{_UNIT_PATTERN}",
+            re.IGNORECASE,
+        )
+
+    def canonical_name(self, name: str) -> Optional[str]:
+        """Canonical test for a name that contains a known synonym, else None"""
+        match = self.name_pattern.search(name)
+        if match is None:
+            return None
+        return self.canonical_by_synonym.get(" ".join(match.group().lower().split()))
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Return every reported value, in order of appearance
+
+        Repeat measurements of a test (e.g. "Hemoglobin 11.2" then "Hb 9.8")
+        are all kept; only exact repeats of the same test, value and unit
+        (such as a page's text layer and its OCR) are dropped. A token after
+        the value that is not a known unit (e.g. "normal") leaves the unit
+        empty.
+        """
+        results = []
+        seen = set()
+
+        for match in self.pattern.finditer(text):
+            name = " ".join(match.group("name").split())
+            canonical = self.canonical_by_synonym[name.lower()]
+            value = float(match.group("value").replace(",", ""))
+            unit = match.group("unit") or ""
+            if normalize_unit(unit) not in self.known_units:
+                unit = ""
+
+            key = (canonical, value, normalize_unit(unit))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            results.append(
+                {"test": name, "canonical": canonical, "value": value, "unit": unit}
+            )
+
+        return results
+
+
+# Global instance
+lab_extractor = LabValueExtractor()
@@ -0,0 +1,178 @@
+"""
+Lab Panel Scoring
+Columnar abnormality detection and weighted severity for lab panels, so
+thousands of panels can be scored with a handful of NumPy passes
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Severity weight per canonical test (tests not listed weigh 1.0)
+TEST_WEIGHTS = {
+    "potassium": 3.0,
+    "sodium": 2.5,
+    "calcium": 2.0,
+    "glucose": 2.0,
+    "hemoglobin": 2.0,
+    "platelet": 2.0,
+    "wbc": 2.0,
+    "creatinine": 2.0,
+    "bun": 1.5,
+    "bilirubin": 1.5,
+    "alt": 1.5,
+    "ast": 1.5,
+    "hba1c": 1.5,
+    "cholesterol": 0.5,
+    "hdl": 0.5,
+    "ldl": 0.5,
+    "triglycerides": 0.5,
+    "vitamin_d": 0.5,
+    "vitamin_b12": 0.5,
+}
+
+# Deviations beyond this many percent add no further severity
+MAX_DEVIATION_PCT = 200.0
+
+# Abnormality counts: 0 NORMAL, 1-2 MILD, 3-4 MODERATE, 5+ SIGNIFICANT
+SEVERITY_COUNT_BINS = np.array([1, 3, 5])
+SEVERITY_LABELS = np.array(["NORMAL", "MILD", "MODERATE", "SIGNIFICANT"])
+
+
+def _range_text(min_val: Optional[float], max_val: Optional[float]) -> str:
+    if min_val is not None and max_val is not None:
+        return f"{min_val}-{max_val}"
+    return f">{min_val}" if min_val is not None else f"<{max_val}"
+
+
+class LabPanelScorer:
+    """Scores lab panels (lists of extracted lab values) in one columnar pass"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.weights = TEST_WEIGHTS if weights is None else weights
+
+    def score_arrays(
+        self,
+        values: np.ndarray,
+        mins: np.ndarray,
+        maxs: np.ndarray,
+        weights: np.ndarray,
+        panel_index: np.ndarray,
+        num_panels: int,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score lab values held in columns
+
+        values/mins/maxs/weights are float arrays with one entry per lab
+        value (NaN for an open bound) and panel_index maps each value to
+        its panel. Returns per-value "low", "high" and "deviation" (percent
+        outside the range) and per-panel "abnormal_count", "severity" and
+        "severity_score".
+        """
+        # No range at all, or the {"max": 0} "unknown test" sentinel
+        has_range = ~(np.isnan(mins) & np.isnan(maxs)) & (maxs != 0)
+
+        # NaN bounds compare False, so open-ended ranges only flag one side
+        with np.errstate(divide="ignore", invalid="ignore"):
+            low = has_range & (values < mins)
+            high = has_range & ~low & (values > maxs)
+            deviation = np.where(
+                low,
+                ((mins - values) / mins) * 100,
+                np.where(high, ((values - maxs) / maxs) * 100, 0.0),
+            )
+        abnormal = low | high
+
+        capped = np.minimum(deviation, MAX_DEVIATION_PCT)
+        points = np.where(abnormal, weights * (1.0 + capped / 100), 0.0)
+        abnormal_count = np.bincount(panel_index[abnormal], minlength=num_panels)
+        severity = SEVERITY_LABELS[np.digitize(abnormal_count, SEVERITY_COUNT_BINS)]
+        score = np.bincount(panel_index, weights=points, minlength=num_panels)
+        score = score.astype(np.float64)  # bincount of no values returns ints
+
+        return {
+            "low": low,
+            "high": high,
+            "deviation": deviation,
+            "abnormal_count": abnormal_count,
+            "severity": severity,
+            "severity_score": score,
+        }
+
+    def score_panels(
+        self, panels: Sequence[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Score many panels at once
+
+        Each lab needs "test", "value", "unit" and "normal_range" (as built by
+        ReportAnalyzer._extract_lab_values). Returns one dict per panel with
+        "abnormalities" and "severity" (identical to the per-report path) plus
+        a weighted "severity_score".
+        """
+        num_panels = len(panels)
+        labs = [lab for panel in panels for lab in panel]
+        nan = np.nan
+
+        # Gather all columns in one pass over the dicts (None bounds -> NaN)
+        rows = []
+        for lab in labs:
+            normal_range = lab.get("normal_range") or {}
+            min_val, max_val = normal_range.get("min"), normal_range.get("max")
+            rows.append(
+                (
+                    lab["value"],
+                    nan if min_val is None else min_val,
+                    nan if max_val is None else max_val,
+                    self.weights.get(lab.get("canonical"), 1.0),
+                )
+            )
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        values, mins, maxs, weights = columns.T
+
+        counts = np.fromiter(
+            (len(panel) for panel in panels), dtype=np.int64, count=num_panels
+        )
+        panel_index = np.repeat(np.arange(num_panels), counts)
+        scored = self.score_arrays(values, mins, maxs, weights, panel_index, num_panels)
+
+        results = [
+            {"abnormalities": [], "severity": severity, "severity_score": round(score, 2)}
+            for severity, score in zip(
+                scored["severity"].tolist(), scored["severity_score"].tolist()
+            )
+        ]
+
+        # Only flagged values are turned back into dicts
+        flagged = np.flatnonzero(scored["low"] | scored["high"])
+        range_texts = {}
+        for i, owner, is_low, pct in zip(
+            flagged.tolist(),
+            panel_index[flagged].tolist(),
+            scored["low"][flagged].tolist(),
+            scored["deviation"][flagged].tolist(),
+        ):
+            lab = labs[i]
+            bounds = (lab["normal_range"].get("min"), lab["normal_range"].get("max"))
+            if bounds not in range_texts:
+                range_texts[bounds] = _range_text(*bounds)
+            abnormality = {
+                "test": lab["test"],
+                "value": lab["value"],
+                "unit": lab["unit"],
+                "normal_range": range_texts[bounds],
+                "status": "LOW" if is_low else "HIGH",
+                "deviation": f"{pct:.1f}% {'below' if is_low else 'above'} normal",
+            }
+            if lab.get("unit_inferred"):
+                abnormality["unit_inferred"] = True
+            results[owner]["abnormalities"].append(abnormality)
+
+        return results
+
+
+# Global instance
+lab_scorer = LabPanelScorer()
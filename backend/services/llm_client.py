@@ -0,0 +1,160 @@
+"""
+Shared LLM Client Service
+One process-wide async Groq client with keep-alive connection pooling,
+per-endpoint concurrency limits and timeouts
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import (
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    LLM_ENDPOINT_LIMITS,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_MAX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENDPOINT_LIMITS = {"concurrency": 4, "timeout": 30.0}
+
+
+class LLMClientPool:
+    """Async Groq client shared by the chat, symptom, report and imaging services"""
+
+    def __init__(self):
+        self.api_key = GROQ_API_KEY
+        self._client = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+        if not self.available:
+            logger.warning("⚠️ No Groq API key found, LLM features will use fallbacks")
+            logger.info("💡 Get free API key at: https://console.groq.com/")
+
+    @property
+    def available(self) -> bool:
+        """True when a Groq API key is configured"""
+        return bool(self.api_key) and self.api_key != "your-groq-api-key-here"
+
+    def _get_client(self):
+        """Lazily create the async client and its pooled HTTP transport"""
+        if self._client is None:
+            import httpx
+            from groq import AsyncGroq
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                max_retries=LLM_MAX_RETRIES,
+                http_client=http_client,
+            )
+            logger.info(
+                f"✅ Async Groq client initialized (pool size: {LLM_MAX_CONNECTIONS})"
+            )
+        return self._client
+
+    def _get_limits(self, endpoint: str) -> Dict[str, float]:
+        return LLM_ENDPOINT_LIMITS.get(endpoint, DEFAULT_ENDPOINT_LIMITS)
+
+    def _get_semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        if endpoint not in self._semaphores:
+            limits = self._get_limits(endpoint)
+            self._semaphores[endpoint] = asyncio.Semaphore(int(limits["concurrency"]))
+        return self._semaphores[endpoint]
+
+    async def chat_completion(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **params,
+    ) -> str:
+        """
+        Run a chat completion and return the message text
+
+        Args:
+            endpoint: Caller name used for concurrency limits (chat, symptoms, report, imaging)
+            messages: Chat messages in OpenAI format
+            model: Model name (defaults to GROQ_MODEL)
+            timeout: Overrides the endpoint timeout in seconds
+            **params: Extra completion parameters (temperature, max_tokens, ...)
+
+        Raises:
+            RuntimeError: If no API key is configured
+            asyncio.TimeoutError: If the call exceeds the timeout
+        """
+        if not self.available:
+            raise RuntimeError("Groq API key not configured")
+
+        client = self._get_client()
+        if timeout is None:
+            timeout = self._get_limits(endpoint)["timeout"]
+
+        async with self._get_semaphore(endpoint):
+            response = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=model or GROQ_MODEL,
+                    messages=messages,
+                    **params,
+                ),
+                timeout=timeout,
+            )
+
+        return response.choices[0].message.content.strip()
+
+    async def stream_chat_completion(
+        self,
+        endpoint: str,
+        messages: List[Dict[str, Any]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **params,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding text deltas as they arrive
+
+        The endpoint timeout bounds the wait for the stream to open; the
+        concurrency slot is held until the stream is fully consumed.
+        """
+        if not self.available:
+            raise RuntimeError("Groq API key not configured")
+
+        client = self._get_client()
+        if timeout is None:
+            timeout = self._get_limits(endpoint)["timeout"]
+
+        async with self._get_semaphore(endpoint):
+            stream = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=model or GROQ_MODEL,
+                    messages=messages,
+                    stream=True,
+                    **params,
+                ),
+                timeout=timeout,
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def close(self):
+        """Close pooled connections (called on application shutdown)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            logger.info("✅ Async Groq client closed")
+
+
+# Global instance
+llm_client = LLMClientPool()
@@ -3,24 +3,56 @@ Medical Imaging Analysis Service
 Uses open-source AI models for X-ray and medical image analysis
 """
 
+import asyncio
 import io
 import logging
 from typing import Dict, List, Optional
 
-import cv2
-import numpy as np
-from PIL import Image
+from config import (
+    CHEXPERT_QUANTIZE,
+    CHEXPERT_THRESHOLD,
+    CHEXPERT_WEIGHTS_PATH,
+    GROQ_VISION_MODEL,
+    IMAGING_BATCH_MAX_SIZE,
+    IMAGING_BATCH_MAX_WAIT_MS,
+    IMAGING_JPEG_QUALITY,
+    IMAGING_PASSTHROUGH_MAX_BYTES,
+    IMAGING_TARGET_SIDE,
+)
+from PIL import Image, UnidentifiedImageError
+from services.llm_client import llm_client
+from services.micro_batcher import MicroBatcher
+from services.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
+# Image types the chest X-ray classifier applies to
+XRAY_IMAGE_TYPES = {"xray", "x-ray", "chest xray", "chest x-ray"}
+
+# 16-bit grayscale modes (common for X-ray PNG/TIFF exports)
+HIGH_BIT_DEPTH_MODES = ("I;16", "I;16B", "I;16L", "I")
+
+
+def _to_8bit(image: Image.Image) -> Image.Image:
+    """Scale 16-bit grayscale down to "L" (not clipped); other modes become RGB"""
+    if image.mode in HIGH_BIT_DEPTH_MODES:
+        image = image.convert("I").point(lambda value: value * (1 / 256))
+        return image.convert("L")
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
 
 class MedicalImagingAnalyzer:
     """Analyze medical images (X-rays, CT scans) using AI models"""
 
-    def __init__(self):
+    def __init__(self, registry=model_registry):
         self.model_available = False
-        self.model = None
+        self.registry = registry
         self.labels = []
+        self.batcher = MicroBatcher(
+            self._predict_batch, IMAGING_BATCH_MAX_SIZE, IMAGING_BATCH_MAX_WAIT_MS
+        )
 
         # Try to load medical imaging model
         try:
@@ -61,6 +93,13 @@ class MedicalImagingAnalyzer:
                 "Support Devices",
             ]
 
+            if not CHEXPERT_WEIGHTS_PATH.exists():
+                raise FileNotFoundError(
+                    f"CheXpert weights not found at {CHEXPERT_WEIGHTS_PATH}"
+                )
+
+            # Weights load on the first X-ray, in the batch worker thread
+            self.registry.register("chexpert", self._load_classifier)
             self.model_available = True
             logger.info("✅ Medical imaging AI ready (Chest X-ray classifier)")
 
@@ -84,56 +123,222 @@ class MedicalImagingAnalyzer:
             Dict with findings, confidence scores, and recommendations
         """
         try:
-            # Convert bytes to image
-            nparr = np.frombuffer(image_content, np.uint8)
-            img_cv = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Use the local chest X-ray classifier if available
+            if self.model_available and image_type.lower() in XRAY_IMAGE_TYPES:
+                img_pil = await asyncio.to_thread(self._load_image, image_content)
+                try:
+                    return await self._analyze_with_model(img_pil, image_type)
+                except Exception as e:
+                    self._disable_model(e)
+
+            # Fallback: Use Groq AI for general image description
+            jpeg_bytes = await asyncio.to_thread(
+                self._prepare_vision_payload, image_content
+            )
+            return await self._analyze_with_ai(jpeg_bytes, image_type)
+
+        except Exception as e:
+            logger.error(f"❌ Medical image analysis failed: {e}")
+            raise RuntimeError(f"Failed to analyze medical image: {str(e)}")
 
-            if img_cv is None:
-                raise ValueError("Invalid image file")
+    @property
+    def model(self):
+        """The CheXpert classifier (loaded on first use), or None"""
+        return self.registry.get("chexpert") if self.model_available else None
+
+    def _disable_model(self, error: Exception):
+        """Stop using the classifier after a load or inference failure"""
+        if self.model_available:
+            self.model_available = False
+            logger.error(
+                f"❌ Chest X-ray classifier failed, using the vision model "
+                f"for X-rays from now on: {error}"
+            )
 
-            # Convert to PIL Image
-            img_rgb = cv2.cvtColor(img_cv, cv2.COLOR_BGR2RGB)
-            img_pil = Image.fromarray(img_rgb)
+    def _load_classifier(self):
+        """DenseNet121 with a 14-label head, prepared for CPU inference"""
+        import torch
+        from torchvision.models import densenet121
+
+        model = densenet121(weights=None)
+        model.classifier = torch.nn.Linear(
+            model.classifier.in_features, len(self.labels)
+        )
+
+        checkpoint = torch.load(CHEXPERT_WEIGHTS_PATH, map_location="cpu")
+        model.load_state_dict(self._checked_state_dict(checkpoint))
+
+        model.eval()
+        model = model.to(memory_format=torch.channels_last)
+        if CHEXPERT_QUANTIZE:
+            # Dynamic quantization covers the Linear head; convolutions stay float
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model
 
-            # Use AI model if available
-            if self.model_available and self.model is not None:
-                findings = await self._analyze_with_model(img_pil)
-            else:
-                # Fallback: Use Groq AI for general image description
-                findings = await self._analyze_with_ai(img_pil, image_type)
+    def _checked_state_dict(self, checkpoint) -> Dict:
+        """
+        Validate a {"labels": [...], "state_dict": {...}} checkpoint
+
+        The labels must be the CheXpert labels in self.labels order, since
+        each output is reported under that name. Checkpoints without label
+        metadata (e.g. ChestX-ray14 CheXNet weights, whose 14 outputs are
+        different findings) are refused rather than remapped. Only the
+        DataParallel "module." prefix is stripped; any other layout fails
+        the strict load.
+        """
+        if not isinstance(checkpoint, dict) or "state_dict" not in checkpoint:
+            raise ValueError("CheXpert checkpoint must be a dict with a state_dict")
+        labels = checkpoint.get("labels")
+        if labels is None:
+            raise ValueError("CheXpert checkpoint has no label metadata")
+        if list(labels) != self.labels:
+            raise ValueError(
+                f"Checkpoint labels do not match the CheXpert labels: {list(labels)}"
+            )
 
-            return findings
+        return {
+            key[len("module."):] if key.startswith("module.") else key: value
+            for key, value in checkpoint["state_dict"].items()
+        }
 
-        except Exception as e:
-            logger.error(f"❌ Medical image analysis failed: {e}")
-            raise RuntimeError(f"Failed to analyze medical image: {str(e)}")
+    def _predict_batch(self, tensors: List) -> List[List[float]]:
+        """Per-label probabilities for a batch of preprocessed images"""
+        import torch
+
+        model = self.model
+        with torch.inference_mode():
+            batch = torch.stack(tensors).contiguous(memory_format=torch.channels_last)
+            probabilities = torch.sigmoid(model(batch))
+        logger.info(f"🩻 Classified batch of {len(tensors)} X-ray(s)")
+        return probabilities.tolist()
+
+    async def _analyze_with_model(self, image: Image.Image, image_type: str) -> Dict:
+        """Classify a chest X-ray locally; concurrent requests share a batch"""
+        logger.info("🔬 Using local chest X-ray classifier...")
+        tensor = await asyncio.to_thread(self.transform, image)
+        probabilities = await self.batcher.submit(tensor)
+
+        scores = {
+            label: round(probability, 4)
+            for label, probability in zip(self.labels, probabilities)
+        }
+        detected = sorted(
+            (
+                (label, score)
+                for label, score in scores.items()
+                if label != "No Finding" and score >= CHEXPERT_THRESHOLD
+            ),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+        findings = [
+            {
+                "condition": label,
+                "confidence": score,
+                "description": f"{label} suggested by the chest X-ray classifier "
+                f"({score:.0%} probability)",
+            }
+            for label, score in detected
+        ]
+        if findings:
+            summary = "Possible " + ", ".join(label for label, _ in detected[:5]) + "."
+            recommendations = [
+                "Have a radiologist review the flagged findings",
+                "Correlate findings with symptoms and clinical history",
+            ]
+        else:
+            findings = [
+                {
+                    "condition": "No Finding",
+                    "confidence": scores["No Finding"],
+                    "description": "No CheXpert condition above the detection threshold",
+                }
+            ]
+            summary = "No abnormality detected by the chest X-ray classifier."
+            recommendations = ["Routine radiologist review is still recommended"]
+
+        logger.info(f"✅ Chest X-ray classified: {len(detected)} finding(s)")
+        return {
+            "image_type": image_type,
+            "findings": findings[:5],
+            "summary": summary,
+            "probabilities": scores,
+            "model": "densenet121-chexpert",
+            "recommendations": recommendations,
+            "disclaimer": "⚠️ This is an AI-assisted analysis. Always consult with a qualified radiologist or physician for definitive interpretation and clinical decisions.",
+        }
+
+    def _load_image(self, image_content: bytes) -> Image.Image:
+        """Decode upload bytes into an RGB PIL image (16-bit scaled to 8-bit)"""
+        try:
+            image = Image.open(io.BytesIO(image_content))
+            image.load()
+        except (UnidentifiedImageError, OSError):
+            raise ValueError("Invalid image file")
+        return _to_8bit(image).convert("RGB")
+
+    def _prepare_vision_payload(self, image_content: bytes) -> bytes:
+        """
+        JPEG bytes to send to the vision model
+
+        An RGB/grayscale JPEG that is within IMAGING_PASSTHROUGH_MAX_BYTES
+        and IMAGING_TARGET_SIDE is passed through untouched (only its header is
+        read). Anything else is decoded once, downscaled to IMAGING_TARGET_SIDE
+        (JPEGs via DCT scaling while decoding) and encoded once.
+        """
+        try:
+            image = Image.open(io.BytesIO(image_content))
+        except (UnidentifiedImageError, OSError):
+            raise ValueError("Invalid image file")
+
+        if (
+            image.format == "JPEG"
+            and image.mode in ("RGB", "L")
+            and len(image_content) <= IMAGING_PASSTHROUGH_MAX_BYTES
+            and max(image.size) <= IMAGING_TARGET_SIDE
+        ):
+            logger.info(f"📸 Sending {len(image_content)} byte JPEG unchanged")
+            return image_content
+
+        target = (IMAGING_TARGET_SIDE, IMAGING_TARGET_SIDE)
+        original_size = image.size
+        if image.format == "JPEG":
+            image.draft("RGB" if image.mode != "L" else "L", target)
+        try:
+            image.thumbnail(target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        except OSError:
+            raise ValueError("Invalid image file")
+
+        image = _to_8bit(image)
+
+        buffered = io.BytesIO()
+        image.save(buffered, format="JPEG", quality=IMAGING_JPEG_QUALITY)
+        logger.info(
+            f"📐 Resized {original_size[0]}x{original_size[1]} image to "
+            f"{image.size[0]}x{image.size[1]} ({buffered.tell()} bytes)"
+        )
+        return buffered.getvalue()
 
-    async def _analyze_with_ai(self, image: Image.Image, image_type: str) -> Dict:
+    async def _analyze_with_ai(self, jpeg_bytes: bytes, image_type: str) -> Dict:
         """Analyze medical image using Groq AI with specialized medical prompts"""
         try:
             import base64
 
-            from groq import Groq
-
             logger.info("🤖 Using AI for medical image analysis...")
 
-            # Convert image to base64
-            buffered = io.BytesIO()
-            image.save(buffered, format="JPEG", quality=85)
-            img_base64 = base64.b64encode(buffered.getvalue()).decode()
+            img_base64 = base64.b64encode(jpeg_bytes).decode()
 
             # Use Groq AI with medical imaging expertise
-            import os
-
-            client = Groq(api_key=os.getenv("GROQ_API_KEY", ""))
-
             prompt = self._get_analysis_prompt(image_type)
 
             # Try vision model first (llama-3.2-11b-vision-preview or llava models)
             try:
-                response = client.chat.completions.create(
-                    model="llama-3.2-11b-vision-preview",
-                    messages=[
+                analysis_text = await llm_client.chat_completion(
+                    "imaging",
+                    [
                         {
                             "role": "user",
                             "content": [
@@ -150,19 +355,19 @@ class MedicalImagingAnalyzer:
                             ],
                         }
                     ],
+                    model=GROQ_VISION_MODEL,
                     temperature=0.2,
                     max_tokens=1500,
                 )
-                analysis_text = response.choices[0].message.content
                 logger.info("✅ Using vision model for analysis")
             except Exception as vision_error:
                 logger.warning(f"⚠️ Vision model unavailable: {vision_error}")
                 logger.info("💡 Falling back to text-based analysis")
 
                 # Fallback: text-based analysis with detailed prompt
-                response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[
+                analysis_text = await llm_client.chat_completion(
+                    "imaging",
+                    [
                         {
                             "role": "system",
                             "content": "You are an expert radiologist AI assistant specializing in medical image interpretation. Even without seeing the image directly, provide a comprehensive framework for analysis.",
@@ -175,7 +380,6 @@ class MedicalImagingAnalyzer:
                     temperature=0.2,
                     max_tokens=1500,
                 )
-                analysis_text = response.choices[0].message.content
 
             # Parse the AI response into structured format
             findings = self._parse_ai_analysis(analysis_text, image_type)
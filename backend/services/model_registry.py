@@ -0,0 +1,150 @@
+"""
+Model Registry
+Loads models on first use, shares them across threads and evicts the least
+recently used ones when resident models exceed a memory budget
+"""
+
+import gc
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from config import MODEL_MEMORY_BUDGET_MB
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate_size_mb(obj: Any) -> float:
+    """Estimate parameter memory of a model, pipeline or (tokenizer, model) tuple"""
+    if isinstance(obj, (tuple, list)):
+        return sum(_estimate_size_mb(item) for item in obj)
+
+    module = getattr(obj, "model", obj)  # transformers pipelines wrap the model
+    parameters = getattr(module, "parameters", None)
+    if not callable(parameters):
+        return 0.0
+
+    try:
+        size = sum(p.numel() * p.element_size() for p in parameters())
+        size += sum(b.numel() * b.element_size() for b in module.buffers())
+        return size / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class ModelRegistry:
+    """
+    Registry of lazily loaded models
+
+    Each model is registered with a loader callable and is only loaded the
+    first time it is requested. Concurrent first requests for the same model
+    wait on a per-model lock, so it is loaded exactly once. When the total
+    estimated size of resident models exceeds the budget, the least recently
+    used models are unloaded (they are reloaded on next use).
+    """
+
+    def __init__(self, memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: "OrderedDict[str, tuple]" = OrderedDict()  # name -> (model, size_mb)
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """Register a loader; the model is not loaded until first requested"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """Return the model, loading it on first use"""
+        model = self._get_resident(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._load_locks[name]:
+            # Another thread may have finished loading while we waited
+            model = self._get_resident(name)
+            if model is not None:
+                return model
+
+            logger.info(f"📥 Loading {name}...")
+            started = time.perf_counter()
+            model = self._loaders[name]()
+            size_mb = _estimate_size_mb(model)
+            logger.info(
+                f"✅ {name} loaded in {time.perf_counter() - started:.1f}s (~{size_mb:.0f} MB)"
+            )
+
+            with self._lock:
+                self._models[name] = (model, size_mb)
+                self._models.move_to_end(name)
+                self._evict_over_budget(keep=name)
+
+            return model
+
+    def _get_resident(self, name: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                return None
+            self._models.move_to_end(name)
+            return entry[0]
+
+    def _evict_over_budget(self, keep: str):
+        """Unload least recently used models until under budget (caller holds _lock)"""
+        if not self.memory_budget_mb:
+            return
+
+        evicted = False
+        for name in list(self._models):
+            if self.resident_mb() <= self.memory_budget_mb:
+                break
+            if name == keep:
+                continue
+            self._models.pop(name)
+            logger.info(f"♻️ Evicted {name} (model memory budget {self.memory_budget_mb} MB)")
+            evicted = True
+
+        if evicted:
+            self._release_memory()
+
+    def unload(self, name: str):
+        """Drop a resident model; it is reloaded on next use"""
+        with self._lock:
+            if self._models.pop(name, None) is not None:
+                self._release_memory()
+
+    def _release_memory(self):
+        gc.collect()
+        try:
+            import torch
+
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def resident_mb(self) -> float:
+        return sum(size_mb for _, size_mb in self._models.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "registered": sorted(self._loaders),
+                "loaded": {name: round(size, 1) for name, (_, size) in self._models.items()},
+                "resident_mb": round(self.resident_mb(), 1),
+                "budget_mb": self.memory_budget_mb,
+            }
+
+
+# Global instance
+model_registry = ModelRegistry()
@@ -4,7 +4,16 @@ Using pre-trained BioBERT and ClinicalBERT
 """
 
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
+
+from config import (
+    MEDICAL_NER_MODEL,
+    NER_BATCH_SIZE,
+    NER_WINDOW_OVERLAP,
+    NER_WINDOW_TOKENS,
+)
+from services.embedding_service import ENCODER_MODELS, embedding_service
+from services.model_registry import model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +22,7 @@ class MedicalNLPEngine:
     """Core NLP Engine for medical text processing"""
 
     def __init__(self):
-        """Initialize the NLP engine with pre-trained models"""
+        """Initialize the NLP engine (models are loaded on first use)"""
         # Lazy load torch to avoid startup delays
         try:
             import torch
@@ -24,42 +33,31 @@ class MedicalNLPEngine:
             self.device = "cpu"
             logger.info(f"🖥️ Using device: {self.device} (torch not available)")
 
-        # Initialize models (will load pre-trained)
-        self.biobert_model = None
-        self.clinicalbert_model = None
-        self.ner_pipeline = None
+        self.registry = model_registry
+        self.registry.register("ner", self._load_ner_pipeline)
+        self.embeddings = embedding_service  # Registers the BioBERT/ClinicalBERT encoders
 
         logger.info("✅ Medical NLP Engine initialized")
 
-    def load_models(self):
-        """Load pre-trained models (call this after initialization)"""
-        try:
-            from transformers import AutoModel, AutoTokenizer, pipeline
-
-            logger.info("📥 Loading BioBERT...")
-            self.biobert_tokenizer = AutoTokenizer.from_pretrained(
-                "dmis-lab/biobert-v1.1"
-            )
-            self.biobert_model = AutoModel.from_pretrained("dmis-lab/biobert-v1.1")
-            logger.info("✅ BioBERT loaded")
+    def _load_ner_pipeline(self):
+        from transformers import pipeline
 
-            logger.info("📥 Loading ClinicalBERT...")
-            self.clinicalbert_tokenizer = AutoTokenizer.from_pretrained(
-                "emilyalsentzer/Bio_ClinicalBERT"
-            )
-            self.clinicalbert_model = AutoModel.from_pretrained(
-                "emilyalsentzer/Bio_ClinicalBERT"
-            )
-            logger.info("✅ ClinicalBERT loaded")
+        return pipeline(
+            "ner",
+            model=MEDICAL_NER_MODEL,
+            device=0 if self.device == "cuda" else -1,
+        )
 
-            logger.info("📥 Loading NER pipeline...")
-            self.ner_pipeline = pipeline(
-                "ner",
-                model="samrawal/bert-base-uncased_clinical-ner",
-                device=0 if self.device == "cuda" else -1,
-            )
-            logger.info("✅ NER pipeline loaded")
+    @property
+    def ner_pipeline(self):
+        """Clinical NER pipeline (loaded on first access)"""
+        return self.registry.get("ner")
 
+    def load_models(self, names: List[str] = None):
+        """Preload models eagerly (all registered models by default)"""
+        try:
+            for name in names or ["ner", *ENCODER_MODELS]:
+                self.registry.get(name)
             return True
         except Exception as e:
             logger.error(f"❌ Error loading models: {e}")
@@ -70,68 +68,146 @@ class MedicalNLPEngine:
         Extract medical entities from text
         Returns: Dictionary with diseases, symptoms, medications, etc.
         """
-        try:
-            if self.ner_pipeline is None:
-                logger.warning("⚠️ NER pipeline not loaded, loading now...")
-                self.load_models()
-
-            # Extract entities using NER
-            entities = self.ner_pipeline(text)
-
-            # Organize entities by type
-            result = {
-                "diseases": [],
-                "symptoms": [],
-                "medications": [],
-                "procedures": [],
-                "body_parts": [],
-                "all_entities": [],
-            }
-
-            for entity in entities:
-                entity_text = entity["word"]
-                entity_type = entity["entity"]
-                confidence = entity["score"]
-
-                # Clean up entity text
-                entity_text = entity_text.replace("##", "").strip()
-
-                # Categorize entity
-                if "PROBLEM" in entity_type:
-                    result["diseases"].append(
-                        {"text": entity_text, "confidence": confidence}
-                    )
-                elif "TREATMENT" in entity_type:
-                    result["medications"].append(
-                        {"text": entity_text, "confidence": confidence}
-                    )
-                elif "TEST" in entity_type:
-                    result["procedures"].append(
-                        {"text": entity_text, "confidence": confidence}
-                    )
-
-                result["all_entities"].append(
-                    {"text": entity_text, "type": entity_type, "confidence": confidence}
-                )
+        return self.extract_entities_batch([text])[0]
+
+    def extract_entities_batch(
+        self, texts: List[str], batch_size: int = NER_BATCH_SIZE
+    ) -> List[Dict[str, List[str]]]:
+        """
+        Extract medical entities from many texts in padded batches
 
-            # Remove duplicates
-            result["diseases"] = self._remove_duplicates(result["diseases"])
-            result["medications"] = self._remove_duplicates(result["medications"])
-            result["procedures"] = self._remove_duplicates(result["procedures"])
+        Each text is split into overlapping token windows (sentence-aligned
+        where possible) so long reports are not truncated at 512 tokens.
+        All windows go through the NER pipeline together, and entity spans
+        are merged back per document.
+
+        Returns: One entity dictionary per input text
+        """
+        try:
+            ner_pipeline = self.ner_pipeline
+
+            windows = []  # (document index, character offset, window text)
+            for doc_index, text in enumerate(texts):
+                for offset, window_text in self._split_into_windows(
+                    text, ner_pipeline.tokenizer
+                ):
+                    windows.append((doc_index, offset, window_text))
+
+            outputs = (
+                ner_pipeline([w[2] for w in windows], batch_size=batch_size)
+                if windows
+                else []
+            )
 
-            return result
+            # Merge window entities back per document, dropping overlap duplicates
+            doc_entities = [[] for _ in texts]
+            seen = [set() for _ in texts]
+            for (doc_index, offset, _), entities in zip(windows, outputs):
+                for entity in entities:
+                    if entity.get("start") is not None:
+                        entity = dict(entity)
+                        entity["start"] += offset
+                        entity["end"] += offset
+                        key = (entity["start"], entity["end"], entity["entity"])
+                        if key in seen[doc_index]:
+                            continue
+                        seen[doc_index].add(key)
+                    doc_entities[doc_index].append(entity)
+
+            return [self._organize_entities(entities) for entities in doc_entities]
 
         except Exception as e:
             logger.error(f"❌ Error extracting entities: {e}")
-            return {
-                "error": str(e),
-                "diseases": [],
-                "symptoms": [],
-                "medications": [],
-                "procedures": [],
-                "body_parts": [],
-                "all_entities": [],
-            }
+            return [
+                {
+                    "error": str(e),
+                    "diseases": [],
+                    "symptoms": [],
+                    "medications": [],
+                    "procedures": [],
+                    "body_parts": [],
+                    "all_entities": [],
+                }
+                for _ in texts
+            ]
+
+    def _split_into_windows(self, text: str, tokenizer) -> List[Tuple[int, str]]:
+        """Split text into overlapping windows of at most NER_WINDOW_TOKENS tokens"""
+        if not text or not text.strip():
+            return []
+
+        offsets = tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True
+        )["offset_mapping"]
+
+        if len(offsets) <= NER_WINDOW_TOKENS:
+            return [(0, text)]
+
+        windows = []
+        start = 0
+        while start < len(offsets):
+            end = min(start + NER_WINDOW_TOKENS, len(offsets))
+
+            # Prefer to end the window at a sentence boundary
+            if end < len(offsets):
+                for i in range(end - 1, start + NER_WINDOW_TOKENS // 2, -1):
+                    char_end = offsets[i][1]
+                    if text[char_end - 1] in ".!?" or text[char_end : char_end + 1] == "\n":
+                        end = i + 1
+                        break
+
+            char_start = offsets[start][0]
+            windows.append((char_start, text[char_start : offsets[end - 1][1]]))
+
+            if end >= len(offsets):
+                break
+            start = max(end - NER_WINDOW_OVERLAP, start + 1)
+
+        return windows
+
+    def _organize_entities(self, entities: List[Dict]) -> Dict[str, List[str]]:
+        """Group raw NER entities by type"""
+        result = {
+            "diseases": [],
+            "symptoms": [],
+            "medications": [],
+            "procedures": [],
+            "body_parts": [],
+            "all_entities": [],
+        }
+
+        for entity in entities:
+            entity_text = entity["word"]
+            entity_type = entity["entity"]
+            confidence = entity["score"]
+
+            # Clean up entity text
+            entity_text = entity_text.replace("##", "").strip()
+
+            # Categorize entity
+            if "PROBLEM" in entity_type:
+                result["diseases"].append(
+                    {"text": entity_text, "confidence": confidence}
+                )
+            elif "TREATMENT" in entity_type:
+                result["medications"].append(
+                    {"text": entity_text, "confidence": confidence}
+                )
+            elif "TEST" in entity_type:
+                result["procedures"].append(
+                    {"text": entity_text, "confidence": confidence}
+                )
+
+            result["all_entities"].append(
+                {"text": entity_text, "type": entity_type, "confidence": confidence}
+            )
+
+        # Remove duplicates
+        result["diseases"] = self._remove_duplicates(result["diseases"])
+        result["medications"] = self._remove_duplicates(result["medications"])
+        result["procedures"] = self._remove_duplicates(result["procedures"])
+
+        return result
 
     def _remove_duplicates(self, entities: List[Dict]) -> List[Dict]:
         """Remove duplicate entities"""
@@ -144,30 +220,18 @@ class MedicalNLPEngine:
                 unique.append(entity)
         return unique
 
-    def get_embeddings(self, text: str, model_type: str = "biobert"):
+    def get_embeddings(self, text, model_type: str = "biobert"):
         """
-        Get embeddings for text using BioBERT or ClinicalBERT
+        Get embeddings for text (or a list of texts) using BioBERT or ClinicalBERT
+        Returns a (n, hidden_size) tensor of [CLS] embeddings
         """
         try:
-            if model_type == "biobert":
-                tokenizer = self.biobert_tokenizer
-                model = self.biobert_model
-            else:
-                tokenizer = self.clinicalbert_tokenizer
-                model = self.clinicalbert_model
-
-            # Tokenize and get embeddings
-            inputs = tokenizer(
-                text, return_tensors="pt", padding=True, truncation=True, max_length=512
-            )
-
-            with torch.no_grad():
-                outputs = model(**inputs)
+            import torch
 
-            # Get [CLS] token embedding (sentence representation)
-            embeddings = outputs.last_hidden_state[:, 0, :]
+            if model_type not in ENCODER_MODELS:
+                model_type = "clinicalbert"
 
-            return embeddings
+            return torch.from_numpy(self.embeddings.encode(text, model_type))
 
         except Exception as e:
             logger.error(f"❌ Error getting embeddings: {e}")
@@ -3,46 +3,290 @@ Medical Report Analyzer Service
 Analyzes medical reports and provides simplified explanations
 """
 
+import asyncio
+import json
 import logging
 import re
-from typing import Any, Dict, List
-
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from config import (
+    REPORT_ANALYSIS_DEADLINE,
+    REPORT_ANALYSIS_STRATEGY,
+    REPORT_FALLBACK_HEDGE_FRACTION,
+    REPORT_FALLBACK_MAX_CONCURRENCY,
+    REPORT_FALLBACK_TIMEOUT,
+    REPORT_CHUNK_CONCURRENCY,
+    REPORT_CHUNK_MAX_CHARS,
+    REPORT_CHUNKED_ANALYSIS,
+    REPORT_CHUNKED_ANALYSIS_DEADLINE,
+    REPORT_MAX_CHUNKS,
+)
+from knowledge_base.reference_ranges import reference_ranges
+from services.lab_extractor import lab_extractor
+from services.lab_scoring import lab_scorer
+from services.llm_client import llm_client
 from services.nlp_engine import nlp_engine
 
 logger = logging.getLogger(__name__)
 
+# Page markers emitted by DocumentProcessor ("--- Page 3 ---", "--- Page 3 (OCR) ---")
+PAGE_MARKER_PATTERN = re.compile(r"^--- Page \d+(?: \(OCR\))? ---$", re.MULTILINE)
+
+# Overall severity when merging chunk analyses (most severe wins)
+SEVERITY_ORDER = ["NORMAL", "MILD", "MODERATE", "SEVERE", "CRITICAL"]
+
+# Time kept back from the deadline to merge the chunks that finished
+CHUNK_MERGE_MARGIN_SECONDS = 0.5
+
 
 class ReportAnalyzer:
     """Analyzes medical reports and simplifies findings"""
 
     def __init__(self):
         self.nlp_engine = nlp_engine
+        self.llm = llm_client
+
+        # Local analyses get their own small pool (not the shared default
+        # executor); the semaphore makes extra requests wait where they can
+        # still be cancelled before any work starts
+        self._fallback_executor = ThreadPoolExecutor(
+            max_workers=REPORT_FALLBACK_MAX_CONCURRENCY,
+            thread_name_prefix="report-fallback",
+        )
+        self._fallback_slots = asyncio.Semaphore(REPORT_FALLBACK_MAX_CONCURRENCY)
         logger.info("✅ Report Analyzer initialized")
 
-    def analyze_report(self, report_text: str) -> Dict[str, Any]:
+    async def analyze_report(
+        self,
+        report_text: str,
+        patient_sex: Optional[str] = None,
+        patient_age: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
         """
         Analyze a medical report using AI-powered analysis
+        Patient sex and age select the matching lab reference ranges
+
+        The Groq analysis gets `deadline` seconds (by default
+        REPORT_ANALYSIS_DEADLINE, or REPORT_CHUNKED_ANALYSIS_DEADLINE for
+        reports analysed in chunks). If it fails, misses the
+        deadline or returns no usable JSON, the local NER analysis (run in a
+        worker thread) is returned instead. With the "race" strategy the
+        local analysis is started early, once REPORT_FALLBACK_HEDGE_FRACTION
+        of the deadline has passed without an AI result, and whichever valid
+        result finishes first is returned, so a slow Groq call costs little
+        extra latency while fast ones cost no local work. Chunked analyses
+        are not hedged: they return whatever chunks finished.
+
+        The local analysis gets REPORT_FALLBACK_TIMEOUT seconds; past that a
+        degraded result (lab values only, no NER) is returned.
         """
+        chunked = self._is_chunked(report_text)
+        if deadline is None:
+            deadline = REPORT_ANALYSIS_DEADLINE
+            if chunked:
+                deadline = REPORT_CHUNKED_ANALYSIS_DEADLINE
+
+        loop = asyncio.get_running_loop()
+        ai_task = None
+        fallback_task = None
+        fallback_started = None
         try:
             logger.info("📄 Analyzing medical report with AI...")
 
             # PRIMARY: Use Groq AI for intelligent medical report analysis
+            if self.llm.available:
+                ai_task = asyncio.create_task(
+                    self._analyze_with_ai(report_text, deadline)
+                )
+                started = loop.time()
+                hedge = deadline
+                if REPORT_ANALYSIS_STRATEGY == "race" and not chunked:
+                    hedge = deadline * REPORT_FALLBACK_HEDGE_FRACTION
+
+                # Whichever valid result finishes first is returned
+                pending = {ai_task}
+                while pending:
+                    hedging = fallback_task is None and hedge < deadline
+                    wake_at = started + (hedge if hedging else deadline)
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=max(0.0, wake_at - loop.time()),
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done and hedging:
+                        logger.info("⏳ AI analysis is slow, starting local analysis")
+                        fallback_task = self._start_fallback(
+                            report_text, patient_sex, patient_age
+                        )
+                        fallback_started = loop.time()
+                        pending.add(fallback_task)
+                        continue
+                    if not done:
+                        break
+
+                    for task in done:
+                        result = self._finished_result(task, ai_task)
+                        if result is not None:
+                            for other in pending:
+                                other.cancel()
+                            if task is fallback_task:
+                                logger.info("✅ Local analysis finished first")
+                            return result
+
+                if not ai_task.done():
+                    ai_task.cancel()
+                    logger.warning(
+                        f"⏱️ Report analysis deadline ({deadline:.1f}s) hit, "
+                        "using fallback"
+                    )
+
+            # FALLBACK: Use basic NLP extraction, bounded by REPORT_FALLBACK_TIMEOUT
+            if fallback_task is None:
+                fallback_task = self._start_fallback(
+                    report_text, patient_sex, patient_age
+                )
+                fallback_started = loop.time()
+            remaining = REPORT_FALLBACK_TIMEOUT - (loop.time() - fallback_started)
             try:
-                import json
-                import os
-                import re
+                result = await asyncio.wait_for(fallback_task, max(0.0, remaining))
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"⏱️ Local analysis took over {REPORT_FALLBACK_TIMEOUT:.0f}s, "
+                    "returning lab values only"
+                )
+                return self._degraded_analysis(report_text, patient_sex, patient_age)
 
-                from groq import Groq
+            logger.info("✅ Report analysis complete (fallback mode)")
+            return result
 
-                api_key = os.getenv("GROQ_API_KEY", "")
+        except Exception as e:
+            for task in (ai_task, fallback_task):
+                if task is not None:
+                    task.cancel()
+            logger.error(f"❌ Error analyzing report: {e}")
+            return {"success": False, "error": str(e)}
 
-                if api_key:
-                    client = Groq(api_key=api_key)
+    def _finished_result(
+        self, task: asyncio.Task, ai_task: asyncio.Task
+    ) -> Optional[Dict[str, Any]]:
+        """A finished task's analysis, or None if it failed or gave no usable JSON"""
+        if task.exception() is not None:
+            source = "AI" if task is ai_task else "Local"
+            logger.error(
+                f"⚠️ {source} analysis failed: {task.exception()}",
+                exc_info=task.exception(),
+            )
+            return None
+        return task.result()
 
-                    analysis_prompt = f"""You are a medical AI assistant analyzing a medical report. Provide a comprehensive analysis in JSON format.
+    def _is_chunked(self, report_text: str) -> bool:
+        return (
+            REPORT_CHUNKED_ANALYSIS != "off"
+            and len(report_text) > REPORT_CHUNK_MAX_CHARS
+        )
 
-Medical Report:
-{report_text[:3000]}
+    async def _analyze_with_ai(
+        self, report_text: str, deadline: float = REPORT_CHUNKED_ANALYSIS_DEADLINE
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Groq analysis of the report, or None if no response has usable JSON
+
+        Reports longer than REPORT_CHUNK_MAX_CHARS are split on page markers
+        and the chunks are analysed concurrently (map), then merged with
+        deduplication (reduce). Chunks that fail, or are still running when
+        the deadline is near, are left out and the result is marked partial.
+        """
+        if not self._is_chunked(report_text):
+            analysis = await self._request_analysis(
+                report_text[:REPORT_CHUNK_MAX_CHARS]
+            )
+            if analysis is None:
+                return None
+            logger.info("✅ AI report analysis complete")
+            return self._format_analysis(analysis)
+
+        chunks = self._split_report(report_text)
+        logger.info(f"📑 Analyzing long report in {len(chunks)} chunks")
+        slots = asyncio.Semaphore(REPORT_CHUNK_CONCURRENCY)
+
+        async def analyze_chunk(index: int, chunk: str) -> Optional[Dict[str, Any]]:
+            async with slots:
+                return await self._request_analysis(chunk, index, len(chunks))
+
+        tasks = [
+            asyncio.create_task(analyze_chunk(index, chunk))
+            for index, chunk in enumerate(chunks, 1)
+        ]
+        try:
+            budget = max(0.0, deadline - CHUNK_MERGE_MARGIN_SECONDS)
+            done, pending = await asyncio.wait(tasks, timeout=budget)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        analyses = [
+            task.result()
+            for task in tasks
+            if task in done and task.exception() is None and task.result() is not None
+        ]
+        missing = len(chunks) - len(analyses)
+        if missing:
+            logger.warning(
+                f"⚠️ {missing}/{len(chunks)} report chunks failed or timed out "
+                f"({len(pending)} still running)"
+            )
+        if not analyses:
+            return None
+
+        logger.info(f"✅ AI report analysis complete ({len(analyses)} chunks)")
+        result = self._format_analysis(self._merge_analyses(analyses))
+        result["partial"] = missing > 0
+        result["chunks_analyzed"] = len(analyses)
+        result["chunks_total"] = len(chunks)
+        return result
+
+    async def _request_analysis(
+        self, report_text: str, part: int = 1, parts: int = 1
+    ) -> Optional[Dict[str, Any]]:
+        """One Groq analysis call; returns the parsed JSON or None"""
+        ai_response = await self.llm.chat_completion(
+            "report",
+            [
+                {
+                    "role": "user",
+                    "content": self._build_prompt(report_text, part, parts),
+                }
+            ],
+            temperature=0.3,
+            max_tokens=2000,
+        )
+        logger.info(f"🧠 AI report analysis received ({len(ai_response)} chars)")
+        logger.info(f"Full AI response: {ai_response}")
+
+        # Extract JSON from response
+        json_match = re.search(r"\{.*\}", ai_response, re.DOTALL)
+        if not json_match:
+            logger.warning("⚠️ No JSON found in AI response")
+            return None
+
+        try:
+            analysis = json.loads(json_match.group())
+        except json.JSONDecodeError as je:
+            logger.error(f"❌ JSON decode error: {je}")
+            logger.error(f"Failed JSON: {json_match.group()[:500]}")
+            return None
+
+        logger.info(f"✅ Parsed JSON: {list(analysis.keys())}")
+        return analysis
+
+    def _build_prompt(self, report_text: str, part: int = 1, parts: int = 1) -> str:
+        part_label = f" (part {part} of {parts})" if parts > 1 else ""
+        return f"""You are a medical AI assistant analyzing a medical report. Provide a comprehensive analysis in JSON format.
+
+Medical Report{part_label}:
+{report_text}
 
 Analyze this report and provide response in this EXACT JSON format (return ONLY valid JSON):
 {{
@@ -74,211 +318,264 @@ Analyze this report and provide response in this EXACT JSON format (return ONLY
 
 Extract actual values, findings, and conditions from the report. Be specific and accurate."""
 
-                    response = client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",
-                        messages=[{"role": "user", "content": analysis_prompt}],
-                        temperature=0.3,
-                        max_tokens=2000,
-                    )
+    def _split_report(self, report_text: str) -> List[str]:
+        """
+        Split a report into chunks of whole pages up to REPORT_CHUNK_MAX_CHARS
 
-                    ai_response = response.choices[0].message.content.strip()
-                    logger.info(
-                        f"🧠 AI report analysis received ({len(ai_response)} chars)"
-                    )
-                    logger.info(f"Full AI response: {ai_response}")
-
-                    # Extract JSON from response
-                    json_match = re.search(r"\{.*\}", ai_response, re.DOTALL)
-                    if json_match:
-                        try:
-                            analysis = json.loads(json_match.group())
-                            logger.info(f"✅ Parsed JSON: {list(analysis.keys())}")
-
-                            result = {
-                                "success": True,
-                                "summary": analysis.get("summary", "Analysis complete"),
-                                "key_findings": analysis.get("key_findings", []),
-                                "entities": {
-                                    "diseases": [
-                                        {
-                                            "text": d.get("name", "Unknown"),
-                                            "status": d.get("status", "unknown"),
-                                        }
-                                        for d in (
-                                            analysis.get("diseases_conditions", [])
-                                            or []
-                                        )
-                                    ],
-                                    "medications": [
-                                        {
-                                            "text": m.get("name", "Unknown"),
-                                            "purpose": m.get("purpose", ""),
-                                        }
-                                        for m in (analysis.get("medications", []) or [])
-                                    ],
-                                    "procedures": [],
-                                },
-                                "lab_values": analysis.get("lab_values", []),
-                                "abnormalities": analysis.get("abnormalities", []),
-                                "explanation": analysis.get(
-                                    "explanation", "No detailed explanation available"
-                                ),
-                                "severity": analysis.get("severity", "UNKNOWN"),
-                                "recommendations": analysis.get("recommendations", []),
-                            }
-
-                            logger.info("✅ AI report analysis complete")
-                            return result
-                        except json.JSONDecodeError as je:
-                            logger.error(f"❌ JSON decode error: {je}")
-                            logger.error(f"Failed JSON: {json_match.group()[:500]}")
-                    else:
-                        logger.warning("⚠️ No JSON found in AI response")
-            except Exception as e:
-                logger.error(f"⚠️ AI analysis failed: {e}", exc_info=True)
-                # Continue to fallback logic below
-
-            # FALLBACK: Use basic NLP extraction
-            entities = self.nlp_engine.extract_entities(report_text)
-            lab_values = self._extract_lab_values(report_text)
-            abnormalities = self._identify_abnormalities(lab_values)
-            summary = self._generate_summary(entities, abnormalities)
-            explanation = self._create_explanation(entities, abnormalities)
-
-            result = {
-                "success": True,
-                "summary": summary,
-                "entities": {
-                    "diseases": entities["diseases"],
-                    "medications": entities["medications"],
-                    "procedures": entities["procedures"],
-                },
-                "lab_values": lab_values,
-                "abnormalities": abnormalities,
-                "explanation": explanation,
-                "severity": self._assess_severity(abnormalities),
-                "recommendations": self._generate_recommendations(abnormalities),
-            }
+        Pages come from DocumentProcessor's page markers (or blank-line
+        paragraphs when there are none); a page that is too long on its own
+        is cut into pieces. At most REPORT_MAX_CHUNKS chunks are returned.
+        """
+        starts = [m.start() for m in PAGE_MARKER_PATTERN.finditer(report_text)]
+        if starts:
+            bounds = [0, *starts, len(report_text)]
+            pages = [report_text[a:b] for a, b in zip(bounds, bounds[1:])]
+        else:
+            pages = re.split(r"(?<=\n\n)", report_text)
+
+        # Cut oversized pages at line breaks, then pack pieces greedily
+        pieces = []
+        for page in pages:
+            while len(page) > REPORT_CHUNK_MAX_CHARS:
+                cut = page.rfind("\n", 0, REPORT_CHUNK_MAX_CHARS)
+                cut = cut if cut > 0 else REPORT_CHUNK_MAX_CHARS
+                pieces.append(page[:cut])
+                page = page[cut:]
+            pieces.append(page)
+
+        chunks, current = [], ""
+        for piece in pieces:
+            if current.strip() and len(current) + len(piece) > REPORT_CHUNK_MAX_CHARS:
+                chunks.append(current)
+                current = ""
+            current += piece
+        if current.strip():
+            chunks.append(current)
+
+        if len(chunks) > REPORT_MAX_CHUNKS:
+            logger.warning(
+                f"⚠️ Report has {len(chunks)} chunks, "
+                f"analyzing the first {REPORT_MAX_CHUNKS}"
+            )
+        return [chunk.strip() for chunk in chunks[:REPORT_MAX_CHUNKS]]
+
+    def _merge_analyses(self, analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge per-chunk analyses, dropping duplicates; the worst severity wins"""
+
+        def merge(field: str, key=None) -> List[Any]:
+            merged, seen = [], set()
+            for analysis in analyses:
+                for item in analysis.get(field) or []:
+                    identity = key(item) if key and isinstance(item, dict) else item
+                    identity = " ".join(str(identity).lower().split())
+                    if identity and identity not in seen:
+                        seen.add(identity)
+                        merged.append(item)
+            return merged
+
+        def text(field: str) -> str:
+            parts = []
+            for analysis in analyses:
+                value = str(analysis.get(field) or "").strip()
+                if value and value not in parts:
+                    parts.append(value)
+            return "\n\n".join(parts)
+
+        severities = [
+            str(analysis.get("severity", "")).upper()
+            for analysis in analyses
+            if str(analysis.get("severity", "")).upper() in SEVERITY_ORDER
+        ]
 
-            logger.info("✅ Report analysis complete (fallback mode)")
-            return result
+        return {
+            "summary": text("summary"),
+            "key_findings": merge("key_findings"),
+            "diseases_conditions": merge(
+                "diseases_conditions", lambda d: d.get("name")
+            ),
+            "lab_values": merge(
+                "lab_values", lambda lab: (lab.get("test"), lab.get("value"))
+            ),
+            "medications": merge("medications", lambda m: m.get("name")),
+            "abnormalities": merge("abnormalities", lambda a: a.get("finding")),
+            "severity": max(severities, key=SEVERITY_ORDER.index, default="UNKNOWN"),
+            "recommendations": merge("recommendations"),
+            "explanation": text("explanation"),
+        }
 
-        except Exception as e:
-            logger.error(f"❌ Error analyzing report: {e}")
-            return {"success": False, "error": str(e)}
+    def _format_analysis(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a Groq analysis into the report analysis response"""
+        return {
+            "success": True,
+            "summary": analysis.get("summary", "Analysis complete"),
+            "key_findings": analysis.get("key_findings", []),
+            "entities": {
+                "diseases": [
+                    {
+                        "text": d.get("name", "Unknown"),
+                        "status": d.get("status", "unknown"),
+                    }
+                    for d in (analysis.get("diseases_conditions", []) or [])
+                ],
+                "medications": [
+                    {
+                        "text": m.get("name", "Unknown"),
+                        "purpose": m.get("purpose", ""),
+                    }
+                    for m in (analysis.get("medications", []) or [])
+                ],
+                "procedures": [],
+            },
+            "lab_values": analysis.get("lab_values", []),
+            "abnormalities": analysis.get("abnormalities", []),
+            "explanation": analysis.get(
+                "explanation", "No detailed explanation available"
+            ),
+            "severity": analysis.get("severity", "UNKNOWN"),
+            "recommendations": analysis.get("recommendations", []),
+        }
 
-    def _extract_lab_values(self, text: str) -> List[Dict[str, Any]]:
-        """Extract lab values from report text"""
-        lab_values = []
+    def _start_fallback(
+        self, report_text: str, sex: Optional[str], age: Optional[float]
+    ) -> asyncio.Task:
+        """Run the local NER analysis in a worker thread, off the event loop"""
+        return asyncio.create_task(self._run_fallback(report_text, sex, age))
 
-        # Common lab test patterns
-        patterns = [
-            r"(\w+(?:\s+\w+)?)\s*:\s*([0-9.]+)\s*(\w+/?\w*)",  # Test: Value Unit
-            r"(\w+(?:\s+\w+)?)\s+([0-9.]+)\s+(\w+/?\w*)",  # Test Value Unit
-        ]
+    async def _run_fallback(
+        self, report_text: str, sex: Optional[str], age: Optional[float]
+    ) -> Dict[str, Any]:
+        await self._fallback_slots.acquire()
+        try:
+            job = self._fallback_executor.submit(
+                self._analyze_with_nlp, report_text, sex, age
+            )
+        except Exception:
+            self._fallback_slots.release()
+            raise
+
+        # The slot is held until the thread finishes, even if the caller
+        # stops waiting (a running thread cannot be cancelled)
+        loop = asyncio.get_running_loop()
+        job.add_done_callback(
+            lambda _: loop.call_soon_threadsafe(self._fallback_slots.release)
+        )
+        return await asyncio.wrap_future(job)
+
+    def shutdown(self):
+        """Stop the local analysis threads (queued analyses are dropped)"""
+        self._fallback_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _analyze_with_nlp(
+        self, report_text: str, sex: Optional[str] = None, age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Local analysis: NER entities plus rule-based lab value checks"""
+        entities = self.nlp_engine.extract_entities(report_text)
+        return self._local_analysis(entities, report_text, sex, age)
+
+    def _degraded_analysis(
+        self, report_text: str, sex: Optional[str] = None, age: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Rule-based lab value checks only, for when the NER analysis is too slow"""
+        entities = {"diseases": [], "medications": [], "procedures": []}
+        analysis = self._local_analysis(entities, report_text, sex, age)
+        analysis["degraded"] = True
+        return analysis
+
+    def _local_analysis(
+        self,
+        entities: Dict,
+        report_text: str,
+        sex: Optional[str] = None,
+        age: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        lab_values = self._extract_lab_values(report_text, sex, age)
+        abnormalities = self._identify_abnormalities(lab_values)
+        summary = self._generate_summary(entities, abnormalities)
+        explanation = self._create_explanation(entities, abnormalities)
+
+        return {
+            "success": True,
+            "summary": summary,
+            "entities": {
+                "diseases": entities["diseases"],
+                "medications": entities["medications"],
+                "procedures": entities["procedures"],
+            },
+            "lab_values": lab_values,
+            "abnormalities": abnormalities,
+            "explanation": explanation,
+            "severity": self._assess_severity(abnormalities),
+            "recommendations": self._generate_recommendations(abnormalities),
+        }
 
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                test_name = match.group(1).strip()
-                value = float(match.group(2))
-                unit = match.group(3).strip() if len(match.groups()) >= 3 else ""
-
-                # Check if this looks like a lab test
-                if self._is_lab_test(test_name):
-                    lab_values.append(
-                        {
-                            "test": test_name,
-                            "value": value,
-                            "unit": unit,
-                            "normal_range": self._get_normal_range(test_name),
-                            "status": "pending",  # Will be determined
-                        }
-                    )
+    def _extract_lab_values(
+        self, text: str, sex: Optional[str] = None, age: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract lab values from report text (every reported value)
+
+        A value reported without a unit gets the unit its magnitude implies
+        (marked unit_inferred); if that is ambiguous it gets no normal range,
+        so it is never flagged against the wrong scale.
+        """
+        lab_values = []
+
+        for lab in lab_extractor.extract(text):
+            if not lab["unit"]:
+                inferred = reference_ranges.infer_unit(
+                    lab["canonical"], lab["value"], sex, age
+                )
+                if inferred is not None:
+                    lab["unit"] = inferred
+                    lab["unit_inferred"] = True
+            lab["normal_range"] = self._get_normal_range(
+                lab["canonical"], lab["unit"], sex, age
+            )
+            lab["status"] = "pending"  # Will be determined
+            lab_values.append(lab)
 
         return lab_values
 
     def _is_lab_test(self, name: str) -> bool:
         """Check if name looks like a lab test"""
-        common_tests = [
-            "glucose",
-            "hemoglobin",
-            "wbc",
-            "rbc",
-            "platelet",
-            "cholesterol",
-            "hdl",
-            "ldl",
-            "triglycerides",
-            "creatinine",
-            "bun",
-            "alt",
-            "ast",
-            "bilirubin",
-            "sodium",
-            "potassium",
-            "calcium",
-        ]
-        name_lower = name.lower()
-        return any(test in name_lower for test in common_tests)
-
-    def _get_normal_range(self, test_name: str) -> Dict[str, float]:
-        """Get normal range for a lab test"""
-        # Simplified normal ranges (should come from database in production)
-        normal_ranges = {
-            "glucose": {"min": 70, "max": 100, "unit": "mg/dL"},
-            "hemoglobin": {"min": 13, "max": 17, "unit": "g/dL"},
-            "wbc": {"min": 4, "max": 11, "unit": "K/uL"},
-            "cholesterol": {"min": 0, "max": 200, "unit": "mg/dL"},
-            "creatinine": {"min": 0.6, "max": 1.2, "unit": "mg/dL"},
-        }
-
-        test_lower = test_name.lower()
-        for key, range_val in normal_ranges.items():
-            if key in test_lower:
-                return range_val
-
-        return {"min": 0, "max": 0, "unit": ""}
+        return lab_extractor.canonical_name(name) is not None
+
+    def _get_normal_range(
+        self,
+        test_name: str,
+        unit: str = "",
+        sex: Optional[str] = None,
+        age: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """
+        Get normal range for a lab test (canonical name or any synonym),
+        expressed in the reported unit (none when the unit is unknown)
+        """
+        canonical = (
+            test_name
+            if test_name in reference_ranges.tests
+            else lab_extractor.canonical_name(test_name)
+        )
+        normal_range = None
+        if canonical and unit:
+            normal_range = reference_ranges.lookup(canonical, sex, age, unit)
+        return normal_range or {"min": 0, "max": 0, "unit": ""}
 
     def _identify_abnormalities(self, lab_values: List[Dict]) -> List[Dict]:
         """Identify abnormal lab values"""
-        abnormalities = []
+        return lab_scorer.score_panels([lab_values])[0]["abnormalities"]
 
-        for lab in lab_values:
-            normal_range = lab["normal_range"]
-            if not normal_range or normal_range["max"] == 0:
-                continue
-
-            value = lab["value"]
-            min_val = normal_range["min"]
-            max_val = normal_range["max"]
-
-            if value < min_val:
-                deviation = ((min_val - value) / min_val) * 100
-                abnormalities.append(
-                    {
-                        "test": lab["test"],
-                        "value": value,
-                        "unit": lab["unit"],
-                        "normal_range": f"{min_val}-{max_val}",
-                        "status": "LOW",
-                        "deviation": f"{deviation:.1f}% below normal",
-                    }
-                )
-            elif value > max_val:
-                deviation = ((value - max_val) / max_val) * 100
-                abnormalities.append(
-                    {
-                        "test": lab["test"],
-                        "value": value,
-                        "unit": lab["unit"],
-                        "normal_range": f"{min_val}-{max_val}",
-                        "status": "HIGH",
-                        "deviation": f"{deviation:.1f}% above normal",
-                    }
-                )
+    def score_lab_panels(
+        self, panels: List[List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch-score many lab panels (e.g. re-analysis of historical reports)
 
-        return abnormalities
+        Each panel is a list of lab values from _extract_lab_values. Returns
+        per panel the same abnormalities and severity as analyze_report, plus
+        a weighted severity_score.
+        """
+        return lab_scorer.score_panels(panels)
 
     def _generate_summary(self, entities: Dict, abnormalities: List[Dict]) -> str:
         """Generate a brief summary"""
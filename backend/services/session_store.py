@@ -0,0 +1,226 @@
+"""
+Chat Session Store
+Keeps conversation history, rolling summary and extracted symptoms per
+session_id so clients only need to send the new message each turn
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from config import (
+    SESSION_DB_PATH,
+    SESSION_MAX_MESSAGES,
+    SESSION_MAX_SESSIONS,
+    SESSION_STORE_BACKEND,
+    SESSION_TTL_SECONDS,
+)
+from services.conversation_summary import RollingSummary
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSession:
+    """Server-side state for one chat session"""
+
+    def __init__(
+        self,
+        session_id: str,
+        history: Optional[List[dict]] = None,
+        summary_state: Optional[RollingSummary] = None,
+        symptoms: Optional[List[str]] = None,
+        updated_at: Optional[float] = None,
+    ):
+        self.session_id = session_id
+        self.history = history or []
+        self.summary_state = summary_state or RollingSummary()
+        self.symptoms = symptoms or []
+        self.updated_at = updated_at or time.time()
+
+    @property
+    def summary(self) -> str:
+        """Summary of the messages that have left the recent window"""
+        return self.summary_state.text()
+
+    def reset_history(self, history: List[dict]):
+        """Replace the history (e.g. with one sent by the client) and re-summarize it"""
+        self.history = list(history)
+        self.summary_state = RollingSummary()
+        self.summary_state.fold_window(self.history)
+
+    def add_turn(self, user_message: str, assistant_message: str):
+        """Append one user/assistant exchange, keeping the newest messages"""
+        self.history.append({"role": "user", "content": user_message})
+        self.history.append({"role": "assistant", "content": assistant_message})
+
+        # Fold messages leaving the recent window before any are trimmed
+        self.summary_state.fold_window(self.history)
+
+        overflow = len(self.history) - SESSION_MAX_MESSAGES
+        if overflow > 0:
+            self.history = self.history[overflow:]
+            self.summary_state.drop(overflow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "history": self.history,
+            "summary_state": self.summary_state.to_dict(),
+            "symptoms": self.symptoms,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationSession":
+        return cls(
+            session_id=data["session_id"],
+            history=data.get("history", []),
+            summary_state=RollingSummary.from_dict(data.get("summary_state")),
+            symptoms=data.get("symptoms", []),
+            updated_at=data.get("updated_at"),
+        )
+
+
+class SessionStore:
+    """
+    Bounded, TTL-evicting session store
+
+    Sessions live in an in-process LRU. With the "sqlite" backend every save
+    is also written through to a local SQLite file, so sessions survive
+    restarts and LRU eviction. Callers hold turn_lock(session_id) from
+    reading the history to saving the new turn, so concurrent turns on one
+    session run one after another instead of overwriting each other.
+    """
+
+    def __init__(
+        self,
+        backend: str = SESSION_STORE_BACKEND,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        ttl_seconds: int = SESSION_TTL_SECONDS,
+        db_path=SESSION_DB_PATH,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._turn_locks: Dict[str, List] = {}  # session_id -> [asyncio.Lock, waiters]
+        self._db = None
+
+        if backend == "sqlite":
+            try:
+                self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions ("
+                    "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+                )
+                self._db.commit()
+                logger.info(f"✅ Session store using SQLite at {db_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ SQLite session store unavailable, using memory: {e}")
+                self._db = None
+
+    def _is_expired(self, session: ConversationSession) -> bool:
+        return time.time() - session.updated_at > self.ttl_seconds
+
+    def get(self, session_id: str) -> Optional[ConversationSession]:
+        """Return the session if it exists and has not expired"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and self._db is not None:
+                session = self._load_from_db(session_id)
+                if session is not None:
+                    self._remember(session)
+
+            if session is None:
+                return None
+
+            if self._is_expired(session):
+                self._forget(session_id)
+                return None
+
+            self._sessions.move_to_end(session_id)
+            return session
+
+    @asynccontextmanager
+    async def turn_lock(self, session_id: Optional[str]):
+        """Serialize chat turns on one session (no-op without a session_id)"""
+        if not session_id:
+            yield
+            return
+
+        entry = self._turn_locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._turn_locks.pop(session_id, None)
+
+    def get_or_create(self, session_id: str) -> ConversationSession:
+        return self.get(session_id) or ConversationSession(session_id)
+
+    def save(self, session: ConversationSession):
+        """Store the session and refresh its TTL"""
+        session.updated_at = time.time()
+        with self._lock:
+            self._remember(session)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                        (
+                            session.session_id,
+                            json.dumps(session.to_dict()),
+                            session.updated_at,
+                        ),
+                    )
+                    self._db.execute(
+                        "DELETE FROM sessions WHERE updated_at < ?",
+                        (time.time() - self.ttl_seconds,),
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.error(f"❌ Error persisting session: {e}")
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._forget(session_id)
+
+    def _remember(self, session: ConversationSession):
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _forget(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.error(f"❌ Error deleting session: {e}")
+
+    def _load_from_db(self, session_id: str) -> Optional[ConversationSession]:
+        try:
+            row = self._db.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return ConversationSession.from_dict(json.loads(row[0])) if row else None
+        except Exception as e:
+            logger.error(f"❌ Error loading session: {e}")
+            return None
+
+
+# Global instance
+session_store = SessionStore()
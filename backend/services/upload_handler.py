@@ -0,0 +1,246 @@
+"""
+Upload Handling Service
+Streams uploads in chunks to a spooled temporary file, hashing as it goes,
+rejects oversized files early and detects the file type from magic bytes
+"""
+
+import codecs
+import hashlib
+import logging
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from config import MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_SPOOL_MAX_MEMORY
+
+logger = logging.getLogger(__name__)
+
+# Number of leading bytes kept for type sniffing (DICOM's marker sits at offset 128)
+SNIFF_BYTES = 512
+
+# Types accepted by the imaging endpoint (DICOM passes through as it did by MIME type)
+IMAGE_EXTENSIONS = {".jpg", ".png", ".bmp", ".tiff", ".webp", ".gif", ".dcm"}
+
+# DIB header sizes of real bitmaps (BITMAPCOREHEADER, INFO, V4 and V5)
+BMP_DIB_HEADER_SIZES = {12, 40, 108, 124}
+
+TEXT_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+
+class UploadTooLarge(ValueError):
+    """Raised as soon as an upload grows past the size limit"""
+
+
+class UnsupportedFileType(ValueError):
+    """Raised when the upload's content matches no supported file type"""
+
+
+def sniff_file_type(head: bytes, filename: str = "") -> Optional[str]:
+    """
+    Detect the file type from its first bytes
+
+    Returns a canonical extension (".pdf", ".jpg", ...) or None if unknown.
+    The filename is only used to tell DOCX apart from other ZIP containers.
+    """
+    if head.startswith(b"%PDF-"):
+        return ".pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith(b"BM") and _is_bmp_header(head):
+        return ".bmp"
+    if head.startswith((b"II*\x00", b"MM\x00*")):
+        return ".tiff"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return ".webp"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif"
+    if head[128:132] == b"DICM":
+        return ".dcm"
+    if head.startswith(b"PK\x03\x04"):
+        return ".docx" if Path(filename).suffix.lower() == ".docx" else ".zip"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return ".doc"
+
+    # Plain text: BOM-marked UTF-8/UTF-16, or no NUL bytes and decodes as UTF-8
+    # (ignoring a cut multi-byte tail)
+    if head.startswith(TEXT_BOMS):
+        return ".txt"
+    if head and b"\x00" not in head:
+        try:
+            head.decode("utf-8")
+            return ".txt"
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:
+                return ".txt"
+
+    # Other text encodings (e.g. cp1252) are trusted when the client says .txt
+    if Path(filename).suffix.lower() == ".txt":
+        return ".txt"
+    return None
+
+
+def _is_bmp_header(head: bytes) -> bool:
+    """Validate the BITMAPFILEHEADER, so text starting with "BM" is not a bitmap"""
+    if len(head) < 18:
+        return False
+    file_size = int.from_bytes(head[2:6], "little")
+    dib_header_size = int.from_bytes(head[14:18], "little")
+    return (
+        26 <= file_size < 2**31
+        and head[6:10] == b"\x00\x00\x00\x00"
+        and dib_header_size in BMP_DIB_HEADER_SIZES
+    )
+
+
+class SpooledUpload:
+    """A received upload: spooled content, size, SHA-256 and detected type"""
+
+    def __init__(self, file, filename: str, size: int, sha256: str, extension: Optional[str]):
+        self.file = file
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.extension = extension
+
+    @property
+    def typed_filename(self) -> str:
+        """Filename whose extension matches the detected content type"""
+        return f"{Path(self.filename).stem or 'upload'}{self.extension or ''}"
+
+    @property
+    def is_image(self) -> bool:
+        return self.extension in IMAGE_EXTENSIONS
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _Spooler:
+    """Accumulates chunks into a spooled file while hashing and size-checking"""
+
+    def __init__(self, filename: str, max_size: int):
+        self.filename = filename
+        self.max_size = max_size
+        self.spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_MEMORY)
+        self.hasher = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise UploadTooLarge(_too_large_message(self.max_size))
+
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[: SNIFF_BYTES - len(self.head)]
+        self.hasher.update(chunk)
+        self.spool.write(chunk)
+
+    def finish(self) -> SpooledUpload:
+        if self.size == 0:
+            raise ValueError("Empty file uploaded. Please try again.")
+
+        extension = sniff_file_type(self.head, self.filename)
+        if extension is None:
+            raise UnsupportedFileType(
+                f"Unsupported or unrecognized file type: {self.filename}"
+            )
+
+        logger.info(f"📥 Received {self.filename} ({self.size} bytes, detected {extension})")
+        return SpooledUpload(
+            self.spool, self.filename, self.size, self.hasher.hexdigest(), extension
+        )
+
+
+async def receive_upload(
+    upload,
+    max_size: int = MAX_UPLOAD_SIZE,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> SpooledUpload:
+    """
+    Stream an UploadFile into a SpooledTemporaryFile
+
+    Small uploads stay in memory and larger ones roll over to disk. Reading
+    stops with UploadTooLarge as soon as max_size is exceeded, and raises
+    UnsupportedFileType if the content matches no known type.
+    """
+    filename = upload.filename or "upload"
+
+    # Reject early when the size is already known
+    known_size = getattr(upload, "size", None)
+    if known_size is not None and known_size > max_size:
+        raise UploadTooLarge(_too_large_message(max_size))
+
+    spooler = _Spooler(filename, max_size)
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            spooler.write(chunk)
+        return spooler.finish()
+    except Exception:
+        spooler.spool.close()
+        raise
+
+
+def expand_zip_upload(
+    upload: SpooledUpload,
+    max_files: int,
+    max_size: int = MAX_UPLOAD_SIZE,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> List[Tuple[str, Union[SpooledUpload, Exception]]]:
+    """
+    Spool each file inside a ZIP upload
+
+    Directories and hidden/macOS metadata entries are skipped. Each member
+    is size-checked while decompressing, so a zip bomb cannot exceed
+    max_size per file. Returns (member name, upload) pairs; a member that
+    fails is paired with its exception so the caller can report it
+    alongside the others.
+    """
+    members = []
+    upload.file.seek(0)
+    with zipfile.ZipFile(upload.file) as archive:
+        for info in archive.infolist():
+            name = Path(info.filename)
+            if info.is_dir() or any(part.startswith((".", "__MACOSX")) for part in name.parts):
+                continue
+            if len(members) >= max_files:
+                raise ValueError(f"Too many files in archive (maximum {max_files})")
+
+            if info.file_size > max_size:
+                members.append((name.name, UploadTooLarge(_too_large_message(max_size))))
+                continue
+
+            spooler = _Spooler(name.name, max_size)
+            try:
+                with archive.open(info) as member:
+                    while True:
+                        chunk = member.read(chunk_size)
+                        if not chunk:
+                            break
+                        spooler.write(chunk)
+                members.append((name.name, spooler.finish()))
+            except Exception as e:
+                spooler.spool.close()
+                members.append((name.name, e))
+
+    return members
+
+
+def _too_large_message(max_size: int) -> str:
+    return f"File too large. Maximum upload size is {max_size // (1024 * 1024)} MB."
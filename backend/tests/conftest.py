@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import backend modules (services, knowledge_base) like main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
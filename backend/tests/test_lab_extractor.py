@@ -0,0 +1,63 @@
+"""
+Tests for services.lab_extractor
+"""
+
+import pytest
+
+from services.lab_extractor import lab_extractor
+
+
+def extracted(text):
+    return [
+        (lab["canonical"], lab["value"], lab["unit"])
+        for lab in lab_extractor.extract(text)
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Fasting Glucose: 142 mg/dL (70 - 100)", [("glucose", 142.0, "mg/dL")]),
+        ("HDL Cholesterol 38 mg/dL", [("hdl", 38.0, "mg/dL")]),
+        ("ALT (SGPT) 65 U/L", [("alt", 65.0, "U/L")]),
+        ("WBC Count 12.5 K/µL", [("wbc", 12.5, "K/µL")]),
+    ],
+)
+def test_extracts_test_value_and_unit(text, expected):
+    assert extracted(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Vitamin D 25-OH: 12 ng/mL",
+        "Vitamin D, 25-Hydroxy: 12 ng/mL",
+        "Vitamin D (25-OH) 12 ng/mL",
+    ],
+)
+def test_skips_analyte_name_qualifier(text):
+    assert extracted(text) == [("vitamin_d", 12.0, "ng/mL")]
+
+
+def test_thousands_separator():
+    assert extracted("WBC 11,500 /uL") == [("wbc", 11500.0, "/uL")]
+    assert extracted("Platelet Count 250,000 /uL") == [("platelet", 250000.0, "/uL")]
+
+
+def test_non_unit_word_is_not_a_unit():
+    assert extracted("Glucose 100 normal") == [("glucose", 100.0, "")]
+
+
+def test_sentence_period_is_not_part_of_unit():
+    assert extracted("Sodium 139 mmol/L. Potassium 5.8 mEq/L") == [
+        ("sodium", 139.0, "mmol/L"),
+        ("potassium", 5.8, "mEq/L"),
+    ]
+
+
+def test_keeps_repeat_measurements_and_drops_exact_duplicates():
+    text = "Hemoglobin 11.2 g/dL\nHb 9.8 g/dL\n--- Page 1 (OCR) ---\nHGB 11.2 g/dl"
+    assert extracted(text) == [
+        ("hemoglobin", 11.2, "g/dL"),
+        ("hemoglobin", 9.8, "g/dL"),
+    ]
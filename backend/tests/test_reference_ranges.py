@@ -0,0 +1,24 @@
+"""
+Tests for knowledge_base.reference_ranges unit handling
+"""
+
+from knowledge_base.reference_ranges import reference_ranges
+
+
+def test_missing_unit_has_no_conversion_factor():
+    assert reference_ranges.conversion_factor("glucose", "") is None
+
+
+def test_infers_the_only_plausible_unit():
+    assert reference_ranges.infer_unit("glucose", 5.4) == "mmol/L"
+    assert reference_ranges.infer_unit("glucose", 120) == "mg/dL"
+    assert reference_ranges.infer_unit("wbc", 7500) == "/uL"
+
+
+def test_ambiguous_unitless_value_stays_unknown():
+    # 13 fits both g/dL and mmol/L hemoglobin
+    assert reference_ranges.infer_unit("hemoglobin", 13) is None
+
+
+def test_lookup_without_unit_uses_canonical_unit():
+    assert reference_ranges.lookup("glucose")["unit"] == "mg/dL"